@@ -0,0 +1,102 @@
+"""
+Benchmark of lines_merging.merge_small_lines_all against the previous networkx implementation
+(graph with pairwise edges + connected_components) on SVG-like table lines.
+
+Run from the repository root:
+    python -m benchmarks.bench_lines_merging [n_lines ...]
+"""
+# >>>> </> STANDARD IMPORTS </>
+# >>>> ********************************************************************************
+import sys
+import random
+import time
+from itertools import chain
+# >>>> ********************************************************************************
+
+# >>>> </> EXTERNAL IMPORTS </>
+# >>>> ********************************************************************************
+import networkx as nx
+# >>>> ********************************************************************************
+
+# >>>> </> LOCAL IMPORTS </>
+# >>>> ********************************************************************************
+from src_utils.geometry_utils import is_part_of_other, check_line_type, fix_coords_line
+from src_utils.lines_merging import merge_small_lines_all
+# >>>> ********************************************************************************
+
+
+def merge_small_lines_graph(lines, line_type):
+    # previous implementation
+    G = nx.Graph()
+    for i, line in enumerate(lines):
+        G.add_node(i)
+    for i in range(len(lines)):
+        start1, end1 = lines[i][:2], lines[i][2:]
+        for j in range(i + 1, len(lines)):
+            start2, end2 = lines[j][:2], lines[j][2:]
+            if start1 == end2 or start2 == end1 or \
+                    is_part_of_other(lines[i], lines[j], line_type) \
+                    or is_part_of_other(lines[j], lines[i], line_type) \
+                    or start1 == start2 or end1 == end2:
+                G.add_edge(i, j)
+    big_lines = []
+    to_del = []
+    for component in nx.connected_components(G):
+        big_line = [lines[node] for node in component]
+        if len(big_line) > 1:
+            to_del.extend(component)
+            big_lines.append(big_line)
+
+    actual_lines = []
+    for line in big_lines:
+        all_points = list(chain(*[[i[:2], i[2:]] for i in line]))
+        actual_lines.append([*min(all_points), *max(all_points)])
+
+    return [i for c, i in enumerate(lines) if c not in to_del] + actual_lines
+
+
+def merge_small_lines_all_graph(lines):
+    v_lines = [i for i in lines if check_line_type(i) == 'vertical']
+    o_lines = [i for i in lines if check_line_type(i) == 'other']
+    h_lines = [i for i in lines if check_line_type(i) == 'horizontal']
+    return merge_small_lines_graph(h_lines, line_type='horizontal') \
+           + merge_small_lines_graph(v_lines, line_type='vertical') + o_lines
+
+
+def make_table_lines(n_lines, seed=0):
+    # grid lines of a table split into touching / overlapping segments, as in SVG lines_data
+    rng = random.Random(seed)
+    n_grid = max(n_lines // 40, 2)
+    xs = sorted(rng.sample(range(0, 2000), n_grid))
+    ys = sorted(rng.sample(range(0, 2000), n_grid))
+    lines = []
+    while len(lines) < n_lines:
+        if rng.random() < 0.5:
+            y, x0 = rng.choice(ys), rng.randint(0, 1950)
+            line = (x0, y, x0 + rng.randint(1, 50), y)
+        else:
+            x, y0 = rng.choice(xs), rng.randint(0, 1950)
+            line = (x, y0, x, y0 + rng.randint(1, 50))
+        lines.append(fix_coords_line(line))
+    return list(set(lines))
+
+
+def main(sizes):
+    for n_lines in sizes:
+        lines = make_table_lines(n_lines)
+
+        start = time.perf_counter()
+        expected = merge_small_lines_all_graph(lines)
+        graph_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = merge_small_lines_all(lines)
+        sweep_time = time.perf_counter() - start
+
+        assert result == expected, 'merge_small_lines_all output differs from the networkx implementation'
+        print(f'{len(lines):>6} lines | networkx: {graph_time:8.3f} s | sweep: {sweep_time:8.4f} s | '
+              f'x{graph_time / max(sweep_time, 1e-9):.0f}')
+
+
+if __name__ == '__main__':
+    main([int(i) for i in sys.argv[1:]] or [500, 1000, 2000, 4000])
@@ -0,0 +1,141 @@
+"""
+Benchmark of special_symbols_parsing.find_triangles / find_Y with LinesEndpointIndex against the previous
+pairwise implementation on a synthetic SLD: conductor segments on a grid plus triangle and Y symbols.
+Also times detect_symbols with all registered symbols.
+
+The pairwise implementation is quadratic, it is run (and outputs are compared) only up to --max-reference lines.
+
+Run from the repository root:
+    python -m benchmarks.bench_special_symbols [n_lines ...] [--max-reference N]
+"""
+# >>>> </> STANDARD IMPORTS </>
+# >>>> ********************************************************************************
+import argparse
+import random
+import time
+# >>>> ********************************************************************************
+
+# >>>> </> LOCAL IMPORTS </>
+# >>>> ********************************************************************************
+from src_utils.geometry_utils import get_line_length, check_line_type, normalize_lines
+from src_utils.special_symbols_parsing import find_triangles, find_Y, detect_symbols, LinesEndpointIndex
+# >>>> ********************************************************************************
+
+
+def find_triangles_pairwise(horizontal_lines, vertical_lines, inclined_lines):
+    # previous implementation
+    triangles = []
+    for base_line in horizontal_lines:
+        base_start, base_end = base_line[:2], base_line[2:]
+        tmp_lines = {}
+        for line_1 in vertical_lines + inclined_lines:
+            line_1_start, line_1_end = line_1[:2], line_1[2:]
+            if line_1_start == base_start:
+                tmp_lines.setdefault('to_the_left', []).append(line_1)
+            elif line_1_end == base_start:
+                tmp_lines.setdefault('to_the_left', []).append([*line_1_end, *line_1_start])
+            elif line_1_start == base_end:
+                tmp_lines.setdefault('to_the_right', []).append(line_1)
+            elif line_1_end == base_end:
+                tmp_lines.setdefault('to_the_right', []).append([*line_1_end, *line_1_start])
+        if len(tmp_lines.get('to_the_left', [])) == 1 and len(tmp_lines.get('to_the_right', [])) == 1:
+            to_the_left = tmp_lines['to_the_left'][0]
+            to_the_right = tmp_lines['to_the_right'][0]
+            type_to_the_left = check_line_type(to_the_left)
+            type_to_the_right = check_line_type(to_the_right)
+            if (type_to_the_left == 'vertical' and type_to_the_right != type_to_the_left) \
+                    or type_to_the_left == 'other':
+                if tuple(to_the_left[2:]) == tuple(to_the_right[2:]):
+                    triangles.append([base_line, to_the_left, to_the_right])
+    return triangles
+
+
+def find_Y_pairwise(vertical_lines, inclined_lines):
+    # previous implementation
+    y_lines = []
+    for base_line in vertical_lines:
+        base_start = base_line[:2]
+        tmp_lines = []
+        for line_1 in inclined_lines:
+            line_1_start, line_1_end = line_1[:2], line_1[2:]
+            if line_1_start == base_start:
+                tmp_lines.append(line_1)
+            elif line_1_end == base_start:
+                tmp_lines.append([*line_1_end, *line_1_start])
+        if len(tmp_lines) == 2:
+            line1, line2 = tmp_lines
+            if (not ((line1[2] < base_line[0] and line2[2] < base_line[0]) or
+                     (line1[2] > base_line[0] and line2[2] > base_line[0]))) and \
+                    (not (line1[3] > base_line[1] or line2[3] > base_line[1])):
+                base_line_length = get_line_length(base_line)
+                if get_line_length(line1) / base_line_length > 0.5 and \
+                        get_line_length(line2) / base_line_length > 0.5:
+                    y_lines.append([base_line, *tmp_lines])
+    return y_lines
+
+
+def make_sld_lines(n_lines, seed=0):
+    # conductors: chains of horizontal / vertical segments on a grid, symbols: triangles and Ys
+    rng = random.Random(seed)
+    size = int((n_lines * 400) ** 0.5)
+    lines = []
+    while len(lines) < n_lines:
+        kind = rng.random()
+        x, y = rng.randrange(0, size, 5), rng.randrange(0, size, 5)
+        if kind < 0.4:
+            for _ in range(rng.randint(1, 10)):
+                length = rng.randrange(5, 60, 5)
+                lines.append((x, y, x + length, y))
+                x += length
+        elif kind < 0.8:
+            for _ in range(rng.randint(1, 10)):
+                length = rng.randrange(5, 60, 5)
+                lines.append((x, y, x, y + length))
+                y += length
+        elif kind < 0.9:
+            # triangle: horizontal base and two inclined sides meeting at the apex
+            w = rng.randrange(6, 20, 2)
+            lines += [(x, y, x + w, y), (x, y, x + w // 2, y - w), (x + w, y, x + w // 2, y - w)]
+        else:
+            # Y: vertical base and two inclined lines from its top
+            h = rng.randrange(6, 20, 2)
+            lines += [(x, y, x, y + h), (x, y, x - h, y - h), (x, y, x + h, y - h)]
+    lines, line_types = normalize_lines(lines)
+    return [[tuple(line) for line in lines[line_types == line_type].tolist()]
+            for line_type in ('horizontal', 'vertical', 'other')]
+
+
+def main(sizes, max_reference):
+    for n_lines in sizes:
+        horizontal_lines, vertical_lines, inclined_lines = make_sld_lines(n_lines)
+
+        start = time.perf_counter()
+        endpoint_index = LinesEndpointIndex(vertical_lines + inclined_lines)
+        triangles = find_triangles(horizontal_lines, vertical_lines, inclined_lines, endpoint_index=endpoint_index)
+        ys = find_Y(vertical_lines, inclined_lines, endpoint_index=endpoint_index)
+        index_time = time.perf_counter() - start
+        report = f'{n_lines:>6} lines | triangles: {len(triangles):>5} | Ys: {len(ys):>5} | ' \
+                 f'endpoint index: {index_time:8.3f} s'
+
+        # - all registered symbols in one pass over the endpoint graph of all lines
+        start = time.perf_counter()
+        symbols = detect_symbols(LinesEndpointIndex(horizontal_lines + vertical_lines + inclined_lines))
+        report += f' | all symbols ({len(symbols)}): {time.perf_counter() - start:8.3f} s'
+
+        if n_lines <= max_reference:
+            start = time.perf_counter()
+            expected_triangles = find_triangles_pairwise(horizontal_lines, vertical_lines, inclined_lines)
+            expected_ys = find_Y_pairwise(vertical_lines, inclined_lines)
+            pairwise_time = time.perf_counter() - start
+            assert triangles == expected_triangles and ys == expected_ys, \
+                'find_triangles / find_Y output differs from the pairwise implementation'
+            report += f' | pairwise: {pairwise_time:8.3f} s | x{pairwise_time / max(index_time, 1e-9):.0f}'
+        print(report)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sizes', nargs='*', type=int, default=[1000, 5000, 50000])
+    parser.add_argument('--max-reference', type=int, default=5000)
+    args = parser.parse_args()
+    main(args.sizes, args.max_reference)
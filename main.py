@@ -22,11 +22,14 @@ import ujson as json
 # import settings
 from src_logging import log_config
 from src_env import env_config
+from src_utils.executors import pipeline_executor
+from src_utils.jobs import job_manager
 # ---- FastAPI ROUTERS ----
 from src_routers.rtr_parse_sld_table import parse_sld_table_rtr
 from src_routers.rtr_special_symbols_parsing import special_symbols_parse_rtr
 from src_routers.rtr_parse_text import parse_text_rtr
 from src_routers.rtr_panelboard_table_parsing import parse_panelboard_rtr
+from src_routers.rtr_jobs import jobs_rtr
 # >>>> ********************************************************************************
 
 
@@ -66,6 +69,10 @@ description = """
 
 - **Healthcheck allows to monitor operational status of the API -> Returns status <HTTP_200_OK> if service instance is running**).
 
+## Jobs:
+
+- **/v1/jobs/... endpoints accept the same request bodies as the S3 endpoints, return job_id with status <HTTP_202_ACCEPTED> and run parsing in the background -> poll /v1/jobs/{job_id}/ or wait for the result file in S3**.
+
 """
 
 app = FastAPI(
@@ -85,12 +92,14 @@ app.include_router(router=parse_sld_table_rtr)
 app.include_router(router=parse_text_rtr)
 app.include_router(router=special_symbols_parse_rtr)
 app.include_router(router=parse_panelboard_rtr)
+app.include_router(router=jobs_rtr)
 
 
 # ________________________________________________________________________________
 # >>>> </> APP - STARTUP </>
 @app.on_event(event_type="startup")
 async def startup_event():
+    pipeline_executor.start()
     logger.info(">>> PDF Elements Parsing - SERVICE STARTUP COMPLETE <<<")
 
 
@@ -98,6 +107,8 @@ async def startup_event():
 # >>>> </> APP - SHUTDOWN </>
 @app.on_event(event_type="shutdown")
 async def shutdown_event():
+    await job_manager.shutdown()
+    pipeline_executor.shutdown()
     logger.info(">>> PDF Elements Parsing - SERVICE SHUTDOWN <<<")
 
 
@@ -7,25 +7,69 @@ from src_utils.table_values_heuristics import find_panel_name, find_by_pattern_o
 # ________________________________________________________________________________
 # --- APPLICATION SETTINGS ---
 PARALLEL_PROC_TIMEOUT: int = int(os.getenv("PARALLEL_PROC_TIMEOUT"))
+PARALLEL_PROC_WORKERS: int = int(os.getenv("PARALLEL_PROC_WORKERS", os.cpu_count() or 1))
+PARALLEL_PROC_QUEUE_SIZE: int = int(os.getenv("PARALLEL_PROC_QUEUE_SIZE", 8))
+S3_IO_THREADS: int = int(os.getenv("S3_IO_THREADS", 8))
+
+# - Background jobs ("memory" store is per-process, use "s3" with several gunicorn workers).
+#   Pipelines of running jobs wait for free process pool slots, they do not get 503 "Service is busy"
+JOBS_MAX_CONCURRENT: int = int(os.getenv("JOBS_MAX_CONCURRENT", PARALLEL_PROC_WORKERS))
+JOBS_QUEUE_SIZE: int = int(os.getenv("JOBS_QUEUE_SIZE", 100))
+JOB_STORE: str = os.getenv("JOB_STORE", "memory")
+JOB_STORE_TTL: int = int(os.getenv("JOB_STORE_TTL", 24 * 60 * 60))
+JOB_STORE_S3_BUCKET: str = os.getenv("JOB_STORE_S3_BUCKET")
+JOB_STORE_S3_PREFIX: str = os.getenv("JOB_STORE_S3_PREFIX", "pdf-elements-parsing-jobs")
+
+# - Rendered page rasters cache (see src_utils.raster_cache), disk tier is disabled if RASTER_CACHE_DIR is not set
+RASTER_CACHE_MAX_BYTES: int = int(os.getenv("RASTER_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+RASTER_CACHE_DIR: str = os.getenv("RASTER_CACHE_DIR")
+RASTER_CACHE_DISK_MAX_BYTES: int = int(os.getenv("RASTER_CACHE_DISK_MAX_BYTES", 4 * 1024 ** 3))
+
+# - OCR results cache (see src_utils.ocr_cache), disk tier (SQLite file) is disabled if OCR_CACHE_PATH is not set
+OCR_CACHE_MAX_ENTRIES: int = int(os.getenv("OCR_CACHE_MAX_ENTRIES", 50000))
+OCR_CACHE_PATH: str = os.getenv("OCR_CACHE_PATH")
+OCR_CACHE_DISK_MAX_ENTRIES: int = int(os.getenv("OCR_CACHE_DISK_MAX_ENTRIES", 1000000))
 
 AWS_ACCESS_KEY: str = os.getenv("AWS_ACCESS_KEY")
 AWS_SECRET_KEY: str = os.getenv("AWS_SECRET_KEY")
 AWS_REGION_NAME: str = os.getenv("AWS_REGION_NAME")
 
+# - S3 client (shared per process, see src_utils.aws_utils.get_s3_client)
+S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL")  # - e.g. local MinIO / moto server, None for AWS
+S3_MAX_POOL_CONNECTIONS: int = int(os.getenv("S3_MAX_POOL_CONNECTIONS", max(S3_IO_THREADS, 10)))
+S3_TCP_KEEPALIVE: bool = os.getenv("S3_TCP_KEEPALIVE", "true").lower() == "true"
+S3_RETRY_MODE: str = os.getenv("S3_RETRY_MODE", "standard")
+S3_RETRY_MAX_ATTEMPTS: int = int(os.getenv("S3_RETRY_MAX_ATTEMPTS", 5))
+S3_CONNECT_TIMEOUT: int = int(os.getenv("S3_CONNECT_TIMEOUT", 5))
+S3_READ_TIMEOUT: int = int(os.getenv("S3_READ_TIMEOUT", 60))
+
 # ________________________________________________________________________________
 # --- ALGORITHM SETTINGS
+# - Special symbol name -> text put after the closest text, symbols are substituted in this order.
+#   Names are registered detectors (src_utils.special_symbols_parsing.SYMBOL_DETECTORS):
+#   'triangle', 'y', 'ground', 'fuse'
 SPECIAL_SYMBOLS_CONF = {'triangle': '3-wire',
                         'y': '4-wire'}
 OCR_SETTING = dict(apply_ocr=True,
                    ocr_config='-l eng --oem 1 --psm 7 -c page_separator=',
                    to_add_border_pix=0,
-                   dpi=500)
+                   dpi=int(os.getenv("OCR_DPI", 500)),
+                   # - "per_span": one tesseract call per span, "parallel": per span calls on a pool of
+                   #   ocr_workers tesseract processes, "batched": span crops tiled into few composite images
+                   ocr_engine=os.getenv("OCR_ENGINE", "per_span"),
+                   ocr_workers=int(os.getenv("OCR_WORKERS", 4)),
+                   # - Seconds per tesseract call, a timed out span keeps its original text. 0 - no timeout
+                   ocr_timeout=float(os.getenv("OCR_TIMEOUT", 0)))
+
+# - DPI for rasterizing table boxes in find_lines_in_tables_img (None - slice the page image rendered at 72 DPI)
+TABLE_LINES_DPI = int(os.getenv("TABLE_LINES_DPI", 0)) or None
 
 SLD_PARSING_CONF = {'find_lines_in_tables_svg': dict(tol=0),
                     'find_lines_in_tables_img': dict(line_scale=15,
                                                      iterations=1,
                                                      blocksize=15,
-                                                     process_background=False),
+                                                     process_background=False,
+                                                     dpi=TABLE_LINES_DPI),
                     'drop_by_threshold': dict(q=0.5),
                     'filter_bad_lines': dict(tol=0.1),
                     'merge_close_lines': dict(h_tol=6,
@@ -46,7 +90,8 @@ SLD_PARSING_CONF = {'find_lines_in_tables_svg': dict(tol=0),
 ELEMENTS_DETECTION_CONFIG = {'find_lines_in_tables_img': dict(line_scale=15,
                                                               iterations=0,
                                                               blocksize=15,
-                                                              process_background=False),
+                                                              process_background=False,
+                                                              dpi=TABLE_LINES_DPI),
                              'table_searching':
                                  dict(margin=6,  # margin used for cropping (as the boundary line can have big width)
                                       intersection_percentage=0.9,  # percentage of intersection of bounddary and image
@@ -5,6 +5,7 @@ from src_utils.table_parsing import find_lines_in_tables_img, get_horziontal_lin
     find_upper_segment, find_inner_segment, get_vertical_lines_inside_panelboard, \
     get_column_segment_panelboard, find_double_tables_panelboard, parse_inner_values
 from src_utils.table_values_heuristics import parse_upper_values
+from src_utils.spatial_index import IndexedText
 from fastapi import HTTPException
 import pandas as pd
 from copy import deepcopy
@@ -21,12 +22,15 @@ def parse_panelboard_table(parsed_text: list,
                            upper_heuristic_config: dict,
                            original_w: int,
                            original_h: int,
-                           remove_border: bool = True):
+                           remove_border: bool = True,
+                           page=None):
+    # spatial index over page text, all text_in_table queries go through it
+    parsed_text = IndexedText(parsed_text)
     # find lines in tables and tables
     #logger.info(f'Table locations : {table_locations}, {all(table_locations)}')
     if table_locations and all(table_locations):
         #logger.info('Find lines in tables')
-        tables = find_lines_in_tables_img(img_array, table_locations,
+        tables = find_lines_in_tables_img(img_array, table_locations, page=page,
                                           **elements_detection_config['find_lines_in_tables_img'])
     else:
        # logger.info('Iterate through contours')
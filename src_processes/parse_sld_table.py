@@ -1,5 +1,4 @@
-from src_utils.geometry_utils import check_line_type, scale, get_line_length,\
-    fix_coords_line
+from src_utils.geometry_utils import normalize_lines
 from src_utils.table_parsing import find_lines_in_tables_svg, find_lines_in_tables_img, \
     merge_close_lines_tables, merge_on_one_line_tables, text_in_table, drop_by_threshold, \
     find_column_segment_sld, get_horziontal_lines_inside, get_vertical_lines_inside_sld, \
@@ -7,6 +6,7 @@ from src_utils.table_parsing import find_lines_in_tables_svg, find_lines_in_tabl
     check_line_x_ovelapping, get_rows, post_process_table, to_json_preparation, notes_removal, prepare_list_in_val, \
     prepare_list_of_table_rows, values_to_list
 from src_utils.text_parsing import filter_parsed_text
+from src_utils.columnar_text import ColumnarText
 from src_utils.img_processing import delete_objects, del_by_existence
 from copy import deepcopy
 import numpy as np
@@ -23,7 +23,8 @@ def parse_sld_table(parsed_text: list,
                     svg_height: float,
                     original_width: int = None,
                     original_height: int = None,
-                    changed_len: bool = False
+                    changed_len: bool = False,
+                    page=None
                     ):
     # UPD_VACHU TODO wrap to func: separate merged text spans                  
     list_parsed_text = []
@@ -43,22 +44,17 @@ def parse_sld_table(parsed_text: list,
                     list_T.append(Temp_dict)
         else:
             list_parsed_text.append(text_bl)
-    parsed_text = deepcopy(list_parsed_text)
+    # columnar text for table parsing (text_in_table, fix_text_bbox_vlines, get_rows work on its arrays)
+    parsed_text = ColumnarText.from_parsed_text(list_parsed_text)
                         
     # initialize container for results
     original_table_coords = [tuple(i) for i in table_locations]
-    # scale lines if needed
-    #logger.info([original_width, original_height,
-    #      svg_width, svg_height])
+    # scale lines if needed, process lines
     if original_width and original_height:
-        lines = [list(map(int, scale(line, (svg_width, svg_height),
-                                     (original_width, original_height)))) for line in lines]
-
-    # process lines
-    lines = list(map(fix_coords_line, lines))
-    lines = list(set([tuple(i) for i in lines]))
-    lines = [i for i in lines if get_line_length(i) != 1]
-    lines = [i for i in lines if check_line_type(i) in ('horizontal', 'vertical')]
+        lines, line_types = normalize_lines(lines, (svg_width, svg_height), (original_width, original_height))
+    else:
+        lines, line_types = normalize_lines(lines)
+    lines = [tuple(i) for i in lines[line_types != 'other'].tolist()]
     # if original_width/original_height -> scale to size of lines
     #logger.info(table_locations)
     tables = find_lines_in_tables_svg(lines, table_locations,
@@ -66,11 +62,10 @@ def parse_sld_table(parsed_text: list,
 
     if not all([bool(v[0] or v[1]) for v in tables.values()]) or \
         changed_len:
-        tables = find_lines_in_tables_img(img_array, table_locations,
+        tables = find_lines_in_tables_img(img_array, table_locations, page=page,
                                           **config['find_lines_in_tables_img'])
     # process img
-    text_coords = [list(map(int, [i['x0'], i['y0'], i['x1'], i['y1']])) \
-                   for i in parsed_text]
+    text_coords = parsed_text.line_bbox.astype(int).tolist()
     img_processed = delete_objects(deepcopy(img_array), text_coords)
 
     # filter bad lines
@@ -1,4 +1,4 @@
-from src_utils.text_parsing import parse_text_pdf, ocr_text, filter_parsed_text
+from src_utils.text_parsing import iter_text_pdf, ocr_text
 from src_logging.log_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -8,17 +8,16 @@ def parse_text(page, width, height,
                apply_ocr=False,
                ocr_config='',
                to_add_border_pix=0,
-               dpi=500):
+               dpi=500,
+               ocr_engine='per_span',
+               ocr_workers=4,
+               ocr_timeout=0):
     # here should also be functionality for global OCR
-    # parse text from pdf
-    parsed_text = parse_text_pdf(page)
+    # parse text from pdf, filtering it by location on the fly
+    stats = {}
+    parsed_text = list(iter_text_pdf(page, width=width, height=height, stats=stats))
     logger.info('Parsed text from pdf')
-    # filter parsed text by location
-    len_before = len(parsed_text)
-    parsed_text = filter_parsed_text(parsed_text, width=width,
-                                     height=height)
-    len_after = len(parsed_text)
-    logger.info(f'Filtered parsed text, number of instances deleted : {len_before-len_after}')
+    logger.info(f'Filtered parsed text, number of instances deleted : {stats["filtered"]}')
     # additional functionality for local OCR
     if apply_ocr:
         try:
@@ -26,9 +25,12 @@ def parse_text(page, width, height,
                                    pdf_size=(width, height),
                                    to_add_border_pix=to_add_border_pix,
                                    dpi=dpi,
-                                   ocr_config=ocr_config)
+                                   ocr_config=ocr_config,
+                                   ocr_engine=ocr_engine,
+                                   ocr_workers=ocr_workers,
+                                   ocr_timeout=ocr_timeout)
         except Exception as e:
             logger.info(f'Got exception during OCR : {str(e)}')
             pass
     logger.info('Applied local OCR for � marks')
-    return parsed_text, len_before>len_after
+    return parsed_text, stats['filtered'] > 0
@@ -0,0 +1,136 @@
+import fitz
+
+import settings
+from src_processes.parse_text import parse_text
+from src_processes.parse_sld_table import parse_sld_table
+from src_processes.parse_panelboard_table import parse_panelboard_table
+from src_processes.special_symbols_parsing import parse_special_symbols
+from src_utils.loading_utils import load_pdf, load_page, open_pdf
+from src_logging.log_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Pipelines below are executed in worker processes (see src_utils.executors),
+# so they take and return only picklable data: raw PDF bytes and decoded JSON.
+
+
+def _parse_text_page(page, pdf_size):
+    parsed_text, changed_len = parse_text(page=page,
+                                          width=pdf_size[0],
+                                          height=pdf_size[1],
+                                          **settings.OCR_SETTING)
+    return {'parsed_text': parsed_text,
+            'pdf_width': pdf_size[0],
+            'pdf_height': pdf_size[1],
+            'changed_len': changed_len}
+
+
+def _parse_sld_table_page(page, img_array, parsed_text: dict, lines: dict, tables_locations: list):
+    return parse_sld_table(parsed_text=parsed_text['parsed_text'],
+                           lines=lines['lines_data'],
+                           table_locations=tables_locations,
+                           img_array=img_array,
+                           config=settings.SLD_PARSING_CONF,
+                           svg_height=lines['svg_height'],
+                           svg_width=lines['svg_width'],
+                           original_width=parsed_text['pdf_width'],
+                           original_height=parsed_text['pdf_height'],
+                           changed_len=parsed_text['changed_len'],
+                           page=page)
+
+
+def _parse_panelboard_table_page(page, img_array, pdf_size, parsed_text: dict,
+                                 tables_locations: list, remove_border: bool = False):
+    return parse_panelboard_table(parsed_text=parsed_text['parsed_text'],
+                                  table_locations=tables_locations,
+                                  original_h=pdf_size[1],
+                                  original_w=pdf_size[0],
+                                  img_array=img_array,
+                                  inner_heuristic_config=settings.INNER_HEURISTIC_CONFIG,
+                                  upper_heuristic_config=settings.UPPER_HEURISTIC_CONFIG,
+                                  elements_detection_config=settings.ELEMENTS_DETECTION_CONFIG,
+                                  remove_border=remove_border,
+                                  page=page)
+
+
+def parse_text_pipeline(pdf_bytes: bytes, page_num: int = 0):
+    doc, page, img_array, pdf_size = load_pdf(pdf_file_obj=pdf_bytes,
+                                              page_num=page_num,
+                                              s3_origin=True)
+    return _parse_text_page(page, pdf_size)
+
+
+def parse_sld_table_pipeline(pdf_bytes: bytes, parsed_text: dict, lines: dict,
+                             tables_locations: list, page_num: int = 0):
+    doc, page, img_array, pdf_size = load_pdf(pdf_file_obj=pdf_bytes,
+                                              page_num=page_num,
+                                              s3_origin=True)
+    return _parse_sld_table_page(page, img_array, parsed_text, lines, tables_locations)
+
+
+def parse_panelboard_table_pipeline(pdf_bytes: bytes, parsed_text: dict,
+                                    tables_locations: list, page_num: int = 0,
+                                    remove_border: bool = False):
+    doc, page, img_array, pdf_size = load_pdf(pdf_file_obj=pdf_bytes,
+                                              page_num=page_num,
+                                              s3_origin=True)
+    return _parse_panelboard_table_page(page, img_array, pdf_size, parsed_text,
+                                        tables_locations, remove_border)
+
+
+def parse_special_symbols_pipeline(parsed_text: dict, lines: dict):
+    symbols_text = parse_special_symbols(parsed_text['parsed_text'], lines['lines_data'],
+                                         pdf_width=parsed_text['pdf_width'],
+                                         pdf_height=parsed_text['pdf_height'],
+                                         svg_width=int(lines['svg_width']),
+                                         svg_height=int(lines['svg_height']),
+                                         symbols_text=settings.SPECIAL_SYMBOLS_CONF)
+    return {'parsed_text': symbols_text,
+            'pdf_width': parsed_text['pdf_width'],
+            'pdf_height': parsed_text['pdf_height'],
+            'changed_len': parsed_text['changed_len']}
+
+
+# Document pipelines open the PDF once per chunk of pages and return one
+# {'page_num', 'result', 'error'} record per page, so a single bad page
+# does not fail the whole chunk.
+
+
+def get_page_count(pdf_bytes: bytes) -> int:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def _run_pages(pdf_bytes: bytes, pages: list, page_func):
+    results = []
+    with open_pdf(pdf_bytes) as doc:
+        for page_data in pages:
+            page_num = page_data['page_num']
+            try:
+                page, img_array, pdf_size = load_page(doc, page_num)
+                results.append({'page_num': page_num,
+                                'result': page_func(page, img_array, pdf_size, page_data),
+                                'error': None})
+            except Exception as e:
+                logger.error(f"ERROR -> Failed to parse page {page_num}: {e}")
+                results.append({'page_num': page_num, 'result': None, 'error': str(e)})
+    return results
+
+
+def parse_text_document_pipeline(pdf_bytes: bytes, pages: list):
+    return _run_pages(pdf_bytes, pages,
+                      lambda page, img_array, pdf_size, page_data: _parse_text_page(page, pdf_size))
+
+
+def parse_sld_table_document_pipeline(pdf_bytes: bytes, pages: list):
+    return _run_pages(pdf_bytes, pages,
+                      lambda page, img_array, pdf_size, page_data: _parse_sld_table_page(
+                          page, img_array, page_data['parsed_text'], page_data['lines'],
+                          page_data['tables_locations']))
+
+
+def parse_panelboard_table_document_pipeline(pdf_bytes: bytes, pages: list, remove_border: bool = False):
+    return _run_pages(pdf_bytes, pages,
+                      lambda page, img_array, pdf_size, page_data: _parse_panelboard_table_page(
+                          page, img_array, pdf_size, page_data['parsed_text'],
+                          page_data['tables_locations'], remove_border))
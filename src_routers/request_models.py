@@ -1,6 +1,6 @@
 # >>>> </> STANDARD IMPORTS </>
 # >>>> ********************************************************************************
-from typing import Optional
+from typing import List, Optional
 # >>>> ********************************************************************************
 
 # >>>> </> EXTERNAL IMPORTS </>
@@ -18,12 +18,29 @@ class JSONFileAttrs(BaseModel):
     file_key: str = "sample/file/path.json"
 
 
+# ________________________________________________________________________________
+class DocumentPagesAttrs(BaseModel):
+    """
+    - Document mode attributes. If page_nums or page_start/page_end are set, the endpoint parses all
+      requested pages of the PDF in one call and writes one JSON per page: {out_s3_prefix}/page_{page_num}.json
+    - In document mode input JSON file keys may contain a "{page_num}" placeholder.
+    """
+    page_nums: Optional[List[int]] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    out_s3_prefix: Optional[str] = None
+
+    @property
+    def document_mode(self) -> bool:
+        return self.page_nums is not None or self.page_start is not None or self.page_end is not None
+
+
 # ________________________________________________________________________________
 class TextParsingS3Files(BaseModel):
     pdf_file: PDFFileAttrs
 
 
-class TextParsingS3FilesData(BaseModel):
+class TextParsingS3FilesData(DocumentPagesAttrs):
     """
     - Data model for the request body of the /parse-text-s3/ endpoint.
     """
@@ -90,7 +107,7 @@ class ParseSldTableS3Files(BaseModel):
     tables_locations_json:  JSONFileAttrs = None
 
 
-class ParseSldTableS3FilesData(BaseModel):
+class ParseSldTableS3FilesData(DocumentPagesAttrs):
     """
     - Data model for the request body of the /parse-sld-table-s3/ endpoint.
     """
@@ -131,8 +148,8 @@ class PanelboardTableParsingS3Files(BaseModel):
     tables_locations_json:  JSONFileAttrs = None
 
 
-class PanelboardTableParsingS3FilesData(BaseModel):
-    """55
+class PanelboardTableParsingS3FilesData(DocumentPagesAttrs):
+    """
     - Data model for the request body of the /parse-panelboard-table-s3/ endpoint.
     """
     files: PanelboardTableParsingS3Files
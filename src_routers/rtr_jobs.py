@@ -0,0 +1,116 @@
+# >>>> </> STANDARD IMPORTS </>
+# >>>> ********************************************************************************
+import logging
+from typing import Callable
+# >>>> ********************************************************************************
+
+# >>>> </> EXTERNAL IMPORTS </>
+# >>>> ********************************************************************************
+from fastapi import APIRouter, Request, status
+from fastapi.responses import UJSONResponse
+import ujson as json
+# >>>> ********************************************************************************
+
+# >>>> </> LOCAL IMPORTS </>
+# >>>> ********************************************************************************
+from src_logging import log_config
+from src_utils.jobs import job_manager
+from .rtr_parse_text import post_parse_text_json_s3_func
+from .rtr_parse_sld_table import parse_sld_table_endpoint_s3
+from .rtr_panelboard_table_parsing import parse_panelboard_endpoint_s3
+from .rtr_special_symbols_parsing import parse_special_symbols_endpoint_s3
+from .request_models import TextParsingS3FilesData, ParseSldTableS3FilesData, \
+    PanelboardTableParsingS3FilesData, SpecialSymbolsParsingS3FilesData
+# >>>> ********************************************************************************
+
+
+# ________________________________________________________________________________
+# --- INIT CONFIG - LOGGER SETUP ---
+logger = log_config.setup_logger(logger_name=__name__, logging_level=logging.DEBUG)
+
+# ________________________________________________________________________________
+# --- FastAPI ROUTER ---
+jobs_rtr = APIRouter(prefix="/v1/jobs")
+
+
+async def run_s3_endpoint(endpoint: Callable, files_data):
+    """
+    - Run S3 endpoint function as a background job. Endpoints in document mode return the manifest,
+      it is stored as the job result; single-page endpoints only write their result to S3.
+    """
+    response = await endpoint(files_data)
+    if isinstance(response, UJSONResponse):
+        return json.loads(response.body)
+    return None
+
+
+async def submit_s3_job(request: Request, job_type: str, endpoint: Callable, files_data) -> UJSONResponse:
+    job = await job_manager.submit(job_type=job_type,
+                                   job_func=run_s3_endpoint,
+                                   request_data=files_data.dict(),
+                                   result_file_key=getattr(files_data, "out_s3_prefix", None)
+                                   or files_data.out_s3_file_key,
+                                   endpoint=endpoint,
+                                   files_data=files_data)
+
+    return UJSONResponse(content={'job_id': job['job_id'],
+                                  'status': job['status'],
+                                  'result_file_key': job['result_file_key'],
+                                  'status_url': str(request.url_for("get_job_status", job_id=job['job_id']))},
+                         status_code=status.HTTP_202_ACCEPTED)
+
+
+# ________________________________________________________________________________
+@jobs_rtr.post(path="/parse-text-s3/",
+               responses={202: {}, 503: {}},
+               status_code=status.HTTP_202_ACCEPTED,
+               response_class=UJSONResponse,
+               tags=["Jobs", "Parse Text", "S3"],
+               summary="Submit background job: parse text from PDF and upload JSON to S3")
+async def submit_parse_text_s3_job(request: Request, files_data: TextParsingS3FilesData) -> UJSONResponse:
+    return await submit_s3_job(request, "parse-text-s3", post_parse_text_json_s3_func, files_data)
+
+
+@jobs_rtr.post(path="/parse-sld-table-s3/",
+               responses={202: {}, 503: {}},
+               status_code=status.HTTP_202_ACCEPTED,
+               response_class=UJSONResponse,
+               tags=["Jobs", "Parse SLD Table", "S3"],
+               summary="Submit background job: parse tables relevant to feeder schedules")
+async def submit_parse_sld_table_s3_job(request: Request, files_data: ParseSldTableS3FilesData) -> UJSONResponse:
+    return await submit_s3_job(request, "parse-sld-table-s3", parse_sld_table_endpoint_s3, files_data)
+
+
+@jobs_rtr.post(path="/parse-panelboard-table-s3/",
+               responses={202: {}, 503: {}},
+               status_code=status.HTTP_202_ACCEPTED,
+               response_class=UJSONResponse,
+               tags=["Jobs", "PDF Elements Parsing - Panelboard Table Parsing", "S3"],
+               summary="Submit background job: parse tables relevant to panelboards")
+async def submit_parse_panelboard_table_s3_job(request: Request,
+                                               files_data: PanelboardTableParsingS3FilesData) -> UJSONResponse:
+    return await submit_s3_job(request, "parse-panelboard-table-s3", parse_panelboard_endpoint_s3, files_data)
+
+
+@jobs_rtr.post(path="/parse-special-symbols-s3/",
+               responses={202: {}, 503: {}},
+               status_code=status.HTTP_202_ACCEPTED,
+               response_class=UJSONResponse,
+               tags=["Jobs", "PDF Elements Parsing - Special Symbols Parsing", "S3"],
+               summary="Submit background job: parse special symbols using SVG lines")
+async def submit_parse_special_symbols_s3_job(request: Request,
+                                              files_data: SpecialSymbolsParsingS3FilesData) -> UJSONResponse:
+    return await submit_s3_job(request, "parse-special-symbols-s3", parse_special_symbols_endpoint_s3, files_data)
+
+
+# ________________________________________________________________________________
+@jobs_rtr.get(path="/{job_id}/",
+              name="get_job_status",
+              responses={200: {}, 404: {}},
+              status_code=status.HTTP_200_OK,
+              response_class=UJSONResponse,
+              tags=["Jobs"],
+              summary="Get status and result of the background job")
+async def get_job_status(job_id: str) -> UJSONResponse:
+    job = await job_manager.get(job_id)
+    return UJSONResponse(content=job, status_code=status.HTTP_200_OK)
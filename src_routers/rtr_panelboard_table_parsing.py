@@ -1,5 +1,6 @@
 # >>>> </> STANDARD IMPORTS </>
 # >>>> ********************************************************************************
+import asyncio
 import logging
 import io
 from typing import Optional, List, Dict, Any
@@ -9,20 +10,23 @@ from dataclasses import dataclass
 # >>>> </> EXTERNAL IMPORTS </>
 # >>>> ********************************************************************************
 from fastapi import APIRouter, HTTPException
-from fastapi import status, UploadFile, File, Form, Response
+from fastapi import status, UploadFile, File, Form, Header, Response
 from fastapi.responses import UJSONResponse
 from pydantic import BaseModel
-import ujson as json
 # >>>> ********************************************************************************
 
 # >>>> </> LOCAL IMPORTS </>
 # >>>> ********************************************************************************
-import settings
 from src_logging import log_config
-from src_processes.parse_panelboard_table import parse_panelboard_table
-from src_utils.loading_utils import load_pdf
+from src_processes.pipelines import parse_panelboard_table_pipeline, \
+    parse_panelboard_table_document_pipeline, get_page_count
 from src_utils.plotting_utils import plot_extracted_messages
-from src_utils.aws_utils import S3Utils
+from src_utils.aws_utils import S3FileOps
+from src_utils.document_utils import resolve_page_nums, check_out_s3_prefix, \
+    download_document_inputs, upload_document_results
+from src_utils.executors import pipeline_executor
+from src_utils.wire_format import JSON_FORMAT, get_wire_format, get_accepted_wire_format, decode_payload, \
+    encode_payload, payload_response
 from .request_models import PanelboardTableParsingS3FilesData
 # >>>> ********************************************************************************
 
@@ -54,43 +58,36 @@ async def parse_panelboard_endpoint(parsed_text_file: UploadFile = File(...),
                                     tables_locations: Optional[UploadFile] = None,
                                     page_num: int = 0,
                                     table_as_input: bool = True,
-                                    remove_border: bool = False):
-    if not parsed_text_file.filename.endswith('.json'):
-        raise HTTPException(404, f'File with filename {parsed_text_file.filename} does not end with .json')
+                                    remove_border: bool = False,
+                                    accept: str = Header(default=None)):
+    # - parsed_text_file / tables_locations: JSON, msgpack or NPZ (by extension or content type),
+    #   response: JSON or msgpack (by Accept header)
+    parsed_text_format = get_wire_format(parsed_text_file.filename, parsed_text_file.content_type)
 
     if not file.filename.endswith('.pdf'):
         raise HTTPException(404, f'File with filename {file.filename} does not end with .pdf')
 
-    tables_locations = json.loads(await tables_locations.read()) if tables_locations else []
+    tables_locations = decode_payload(await tables_locations.read(),
+                                      get_wire_format(tables_locations.filename, tables_locations.content_type,
+                                                      default=JSON_FORMAT)) if tables_locations else []
 
-    parsed_text = await parsed_text_file.read()
-    parsed_text = json.loads(parsed_text)
-
-    # get parsed text
-    parsed_text, pdf_width, pdf_height = parsed_text['parsed_text'], \
-                                         parsed_text['pdf_width'], \
-                                         parsed_text['pdf_height']
+    parsed_text = decode_payload(await parsed_text_file.read(), parsed_text_format)
 
     # get pdf
-    doc, page, img_array, pdf_size = load_pdf(pdf_file_obj=file,
-                                              page_num=page_num,
-                                              s3_origin=False)
+    pdf_bytes = await file.read()
 
     if table_as_input:
-        tables_locations = [[0, 0, pdf_width, pdf_height]]
+        tables_locations = [[0, 0, parsed_text['pdf_width'], parsed_text['pdf_height']]]
 
     # parse panelboard tables
-    tables = parse_panelboard_table(parsed_text=parsed_text,
-                                    table_locations=tables_locations,
-                                    original_h=pdf_size[1],
-                                    original_w=pdf_size[0],
-                                    img_array=img_array,
-                                    inner_heuristic_config=settings.INNER_HEURISTIC_CONFIG,
-                                    upper_heuristic_config=settings.UPPER_HEURISTIC_CONFIG,
-                                    elements_detection_config=settings.ELEMENTS_DETECTION_CONFIG,
-                                    remove_border=remove_border)
+    tables = await pipeline_executor.run_cpu_bound(parse_panelboard_table_pipeline,
+                                                   pdf_bytes=pdf_bytes,
+                                                   parsed_text=parsed_text,
+                                                   tables_locations=tables_locations,
+                                                   page_num=page_num,
+                                                   remove_border=remove_border)
 
-    return UJSONResponse(content=tables)
+    return payload_response(tables, get_accepted_wire_format(accept))
 
 
 @dataclass()
@@ -110,71 +107,53 @@ class ExtractClassifiedObjectsJsonData:
 async def parse_panelboard_endpoint_s3(files_data: PanelboardTableParsingS3FilesData) -> Response:
     # ________________________________________________________________________________
     # --- INIT S3 UTILS INSTANCE ---
-    s3 = S3Utils()
-
-    # --- DOWNLOAD | PDF FILE | FROM AWS S3 ---
-    pdf_file_bytes = s3.download_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                          s3_file_key=files_data.files.pdf_file.file_key)
-
-    # --- DOWNLOAD | LINES JSON | FROM AWS S3 ---
-    lines_json_bytes = s3.download_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                            s3_file_key=files_data.files.lines_json.file_key)
-    lines_json_decoded = lines_json_bytes.getvalue().decode("utf-8")
-    lines = json.loads(lines_json_decoded)
-
-    # --- DOWNLOAD | PARSED TEXT JSON | FROM AWS S3 ---
-    parsed_text_json_bytes = s3.download_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                                  s3_file_key=files_data.files.parsed_text_json.file_key)
-    parsed_text_json_decoded = parsed_text_json_bytes.getvalue().decode("utf-8")
-    parsed_text = json.loads(parsed_text_json_decoded)
-
-    # --- DOWNLOAD | TABLES LOCATIONS JSON | FROM AWS S3 ---
-    if files_data.files.tables_locations_json:
-        tables_locations_json_bytes = s3.download_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                                           s3_file_key=files_data.files.tables_locations_json.file_key)
-        tables_locations_json_decoded = tables_locations_json_bytes.getvalue().decode("utf-8")
-        tables_locations = json.loads(tables_locations_json_decoded)
-    else:
-        tables_locations = []
+    s3 = S3FileOps(s3_bucket_name=files_data.s3_bucket_name)
+
+    if files_data.document_mode:
+        pdf_file_bytes = await pipeline_executor.run_io_bound(s3.get_pdf_file_obj_bytes,
+                                                              s3_file_key=files_data.files.pdf_file.file_key)
+        return await parse_panelboard_document_s3(files_data=files_data,
+                                                  pdf_bytes=pdf_file_bytes.getvalue())
+
+    # --- DOWNLOAD | PDF FILE, PARSED TEXT JSON, TABLES LOCATIONS JSON | FROM AWS S3 ---
+    # - All inputs are downloaded concurrently, every file is decoded in its I/O thread as soon as it arrives
+    # - JSON, msgpack or NPZ by file key extension
+    load_tables_locations = files_data.files.tables_locations_json and not files_data.table_as_input
+    pdf_file_bytes, parsed_text, tables_locations = await asyncio.gather(
+        pipeline_executor.run_io_bound(s3.get_pdf_file_obj_bytes,
+                                       s3_file_key=files_data.files.pdf_file.file_key),
+        pipeline_executor.run_io_bound(s3.get_file_data,
+                                       s3_file_key=files_data.files.parsed_text_json.file_key),
+        pipeline_executor.run_io_bound(s3.get_file_data,
+                                       s3_file_key=files_data.files.tables_locations_json.file_key)
+        if load_tables_locations else asyncio.sleep(0, result=[]))
 
     # ________________________________________________________________________________
     # --- PARSE PANELBOARD TABLES ---
     # ________________________________________________________________________________
-    # - GET PARSED TEXT
-    parsed_text, pdf_width, pdf_height = parsed_text['parsed_text'], \
-                                         parsed_text['pdf_width'], \
-                                         parsed_text['pdf_height']
-
-    # - GET PDF
-    doc, page, img_array, pdf_size = load_pdf(pdf_file_obj=pdf_file_bytes,
-                                              page_num=files_data.page_num,
-                                              s3_origin=True)
-
     if files_data.table_as_input:
-        tables_locations = [[0, 0, pdf_width, pdf_height]]
-
-
-    # - PARSE PANELBOARD TABLES
-    tables = parse_panelboard_table(parsed_text=parsed_text,
-                                    table_locations=tables_locations,
-                                    original_h=pdf_size[1],
-                                    original_w=pdf_size[0],
-                                    img_array=img_array,
-                                    inner_heuristic_config=settings.INNER_HEURISTIC_CONFIG,
-                                    upper_heuristic_config=settings.UPPER_HEURISTIC_CONFIG,
-                                    elements_detection_config=settings.ELEMENTS_DETECTION_CONFIG,
-                                    remove_border=files_data.remove_border)
+        tables_locations = [[0, 0, parsed_text['pdf_width'], parsed_text['pdf_height']]]
+
+    # - LOAD PDF AND PARSE PANELBOARD TABLES
+    tables = await pipeline_executor.run_cpu_bound(parse_panelboard_table_pipeline,
+                                                   pdf_bytes=pdf_file_bytes.getvalue(),
+                                                   parsed_text=parsed_text,
+                                                   tables_locations=tables_locations,
+                                                   page_num=files_data.page_num,
+                                                   remove_border=files_data.remove_border)
     # ________________________________________________________________________________
 
-    # --- CONVERT JSON TO BYTES STREAM ---
-    json_payload = json.dumps(tables)
-    json_byte_stream = io.BytesIO(json_payload.encode("utf-8"))
+    # --- ENCODE RESULT (JSON OR MSGPACK BY OUT FILE KEY EXTENSION) TO BYTES STREAM ---
+    out_payload = encode_payload(tables, get_wire_format(filename=files_data.out_s3_file_key,
+                                                         default=JSON_FORMAT))
+    json_byte_stream = io.BytesIO(out_payload)
 
     # --- UPLOAD FILE TO AWS S3 BUCKET ---
     try:
-        s3_upload_status = s3.upload_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                              s3_file_key=files_data.out_s3_file_key,
-                                              file_byte_stream=json_byte_stream)
+        s3_upload_status = await pipeline_executor.run_io_bound(s3.upload_file_obj,
+                                                                s3_bucket_name=files_data.s3_bucket_name,
+                                                                s3_file_key=files_data.out_s3_file_key,
+                                                                file_byte_stream=json_byte_stream)
         if not s3_upload_status:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 detail=f"ERROR -> S3 upload status: {s3_upload_status}")
@@ -183,3 +162,44 @@ async def parse_panelboard_endpoint_s3(files_data: PanelboardTableParsingS3Files
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail=f"ERROR -> Failed to upload file to S3. Error: {e}")
+
+
+async def parse_panelboard_document_s3(files_data: PanelboardTableParsingS3FilesData, pdf_bytes: bytes) -> UJSONResponse:
+    """
+    - Document mode of the S3 endpoint: parse tables on all requested pages of already downloaded PDF
+      on all workers and upload one JSON per page under files_data.out_s3_prefix.
+    - Input JSON file keys may contain "{page_num}" placeholder, e.g. "parsed_text/page_{page_num}.json".
+    """
+    check_out_s3_prefix(files_data.out_s3_prefix)
+    # - Opening the PDF is blocking -> page count is read in the I/O thread pool, off the event loop
+    page_count = await pipeline_executor.run_io_bound(get_page_count, pdf_bytes)
+    page_nums = resolve_page_nums(page_count=page_count,
+                                  page_nums=files_data.page_nums,
+                                  page_start=files_data.page_start,
+                                  page_end=files_data.page_end)
+
+    s3 = S3FileOps(s3_bucket_name=files_data.s3_bucket_name)
+    tables_locations_json = files_data.files.tables_locations_json
+    tables_locations_key = tables_locations_json.file_key \
+        if tables_locations_json and not files_data.table_as_input else None
+
+    pages = await download_document_inputs(s3=s3,
+                                           page_nums=page_nums,
+                                           json_file_keys={'parsed_text': files_data.files.parsed_text_json.file_key,
+                                                           'tables_locations': tables_locations_key})
+    for page in pages:
+        if files_data.table_as_input:
+            page['tables_locations'] = [[0, 0, page['parsed_text']['pdf_width'], page['parsed_text']['pdf_height']]]
+        else:
+            page.setdefault('tables_locations', [])
+
+    page_results = await pipeline_executor.map_pages(parse_panelboard_table_document_pipeline,
+                                                     pages=pages,
+                                                     pdf_bytes=pdf_bytes,
+                                                     remove_border=files_data.remove_border)
+
+    manifest = await upload_document_results(s3=s3,
+                                             out_s3_prefix=files_data.out_s3_prefix,
+                                             page_results=page_results)
+
+    return UJSONResponse(content=manifest, status_code=status.HTTP_200_OK)
@@ -6,23 +6,24 @@ import logging
 # >>>> </> EXTERNAL IMPORTS </>
 # >>>> ********************************************************************************
 from fastapi import APIRouter, HTTPException
-from fastapi import status, UploadFile, File, Form
+from fastapi import status, UploadFile, File, Form, Header
 from fastapi.responses import UJSONResponse, StreamingResponse, Response
 # from starlette.responses import StreamingResponse
 import PIL.Image as pil_image
 import ujson as json
 
-import settings
 # >>>> ********************************************************************************
 
 # >>>> </> LOCAL IMPORTS </>
 # >>>> ********************************************************************************
 from src_logging import log_config
-from src_processes.parse_text import parse_text
-from src_utils.loading_utils import load_pdf
+from src_processes.pipelines import parse_text_pipeline, parse_text_document_pipeline, get_page_count
+from src_utils.executors import pipeline_executor
+from src_utils.wire_format import get_accepted_wire_format, payload_response
 from src_utils.plotting_utils import plot_extracted_messages
 from src_utils.zipping_utils import FileProc
 from src_utils.aws_utils import S3FileOps
+from src_utils.document_utils import resolve_page_nums, check_out_s3_prefix, upload_document_results
 from .request_models import TextParsingS3FilesData
 # >>>> ********************************************************************************
 
@@ -58,7 +59,7 @@ parse_text_rtr = APIRouter(prefix="/v1")
 #
 #     if not parsed_text:
 #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-#                             detail=f"No text found in pdf")
+#                             detail="No text found in pdf")
 #
 #     file_name = 'parsed_text.zip'
 #     if not visualize_results:
@@ -86,30 +87,25 @@ parse_text_rtr = APIRouter(prefix="/v1")
                      tags=["Parse Text", "JSON"],
                      summary="Parse text from PDF and return JSON")
 async def post_parse_text_json_func(file: UploadFile = File(...),
-                                    page_num: int = 0) -> UJSONResponse:
-    doc, page, img_array, pdf_size = load_pdf(pdf_file_obj=file,
-                                              page_num=page_num,
-                                              s3_origin=False)
-
-    parsed_text, changed_len = parse_text(page, pdf_size[0], pdf_size[1],
-                                          **settings.OCR_SETTING)
-    parsed_text = {'parsed_text': parsed_text,
-                   'pdf_width': pdf_size[0],
-                   'pdf_height': pdf_size[1],
-                   'changed_len': changed_len}
+                                    page_num: int = 0,
+                                    accept: str = Header(default=None)) -> Response:
+    pdf_bytes = await file.read()
+
+    parsed_text = await pipeline_executor.run_cpu_bound(parse_text_pipeline,
+                                                        pdf_bytes=pdf_bytes,
+                                                        page_num=page_num)
 
     # if not parsed_text:
     #     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-    #                         detail=f"No text found in pdf")
+    #                         detail="No text found in pdf")
 
-    return UJSONResponse(content=parsed_text,
-                         status_code=status.HTTP_200_OK,
-                         media_type="application/json")
+    # - JSON or msgpack by Accept header
+    return payload_response(parsed_text, get_accepted_wire_format(accept))
 
 
 # ________________________________________________________________________________
 @parse_text_rtr.post(path="/parse-text-json-s3/",
-                     responses={200: {}, 500: {}, 503: {}},
+                     responses={200: {}, 400: {}, 404: {}, 500: {}, 503: {}},
                      status_code=status.HTTP_200_OK,
                      response_class=Response,
                      tags=["Parse Text", "S3"],
@@ -121,42 +117,62 @@ async def post_parse_text_json_s3_func(files_data: TextParsingS3FilesData) -> Re
 
     # --- DOWNLOAD PDF FILE FROM AWS S3 ---
     logger.info("- 1 - DOWNLOADING PDF FILE FROM AWS S3 -")
-    pdf_file_bytes = s3.download_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                          s3_file_key=files_data.files.pdf_file.file_key)
-    # --- LOAD PDF FILE DATA ---
-    logger.info("- 2 - LOADING PDF FILE DATA -")
-    doc, page, img_array, pdf_size = load_pdf(pdf_file_obj=pdf_file_bytes,
-                                              page_num=files_data.page_num,
-                                              s3_origin=True)
-
-    # ________________________________________________________________________________
-    # --- PARSE TEXT ---
-    logger.info("- 3 - PARSING TEXT -")
+    pdf_file_bytes = await pipeline_executor.run_io_bound(s3.download_file_obj,
+                                                          s3_bucket_name=files_data.s3_bucket_name,
+                                                          s3_file_key=files_data.files.pdf_file.file_key)
 
-    parsed_text, changed_len = parse_text(page=page,
-                                          width=pdf_size[0],
-                                          height=pdf_size[1],
-                                          **settings.OCR_SETTING)
+    if files_data.document_mode:
+        return await parse_text_document_s3(files_data=files_data, s3=s3, pdf_bytes=pdf_file_bytes.getvalue())
 
-    parsed_text = {'parsed_text': parsed_text,
-                   'pdf_width': pdf_size[0],
-                   'pdf_height': pdf_size[1],
-                   'changed_len': changed_len}
+    # ________________________________________________________________________________
+    # --- LOAD PDF FILE DATA AND PARSE TEXT ---
+    logger.info("- 2 - LOADING PDF FILE DATA AND PARSING TEXT -")
+    parsed_text = await pipeline_executor.run_cpu_bound(parse_text_pipeline,
+                                                        pdf_bytes=pdf_file_bytes.getvalue(),
+                                                        page_num=files_data.page_num)
 
     if not parsed_text:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"No text found in pdf")
+                            detail="No text found in pdf")
 
     # ________________________________________________________________________________
     # --- UPLOAD RESULTS TO AWS S3 ---
     try:
-        logger.info("- 4 - UPLOADING RESULTS TO AWS S3 -")
+        logger.info("- 3 - UPLOADING RESULTS TO AWS S3 -")
 
-        s3.upload_json_file_to_bucket(s3_file_key=files_data.out_s3_file_key,
-                                      data_for_json=parsed_text)
+        # - JSON or msgpack by out file key extension
+        await pipeline_executor.run_io_bound(s3.upload_file_data,
+                                             s3_file_key=files_data.out_s3_file_key,
+                                             data=parsed_text)
 
         return Response(status_code=status.HTTP_200_OK)
 
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail=f"ERROR -> Failed to upload file to S3. Error: {e}")
+
+
+async def parse_text_document_s3(files_data: TextParsingS3FilesData, s3: S3FileOps, pdf_bytes: bytes) -> UJSONResponse:
+    """
+    - Document mode of /parse-text-json-s3/: parse all requested pages of already downloaded PDF
+      on all workers and upload one JSON per page under files_data.out_s3_prefix.
+    """
+    check_out_s3_prefix(files_data.out_s3_prefix)
+    # - Opening the PDF is blocking -> page count is read in the I/O thread pool, off the event loop
+    page_count = await pipeline_executor.run_io_bound(get_page_count, pdf_bytes)
+    page_nums = resolve_page_nums(page_count=page_count,
+                                  page_nums=files_data.page_nums,
+                                  page_start=files_data.page_start,
+                                  page_end=files_data.page_end)
+
+    logger.info(f"- 2 - PARSING TEXT - DOCUMENT MODE - PAGES: {len(page_nums)} -")
+    page_results = await pipeline_executor.map_pages(parse_text_document_pipeline,
+                                                     pages=[{'page_num': page_num} for page_num in page_nums],
+                                                     pdf_bytes=pdf_bytes)
+
+    logger.info("- 3 - UPLOADING RESULTS TO AWS S3 -")
+    manifest = await upload_document_results(s3=s3,
+                                             out_s3_prefix=files_data.out_s3_prefix,
+                                             page_results=page_results)
+
+    return UJSONResponse(content=manifest, status_code=status.HTTP_200_OK)
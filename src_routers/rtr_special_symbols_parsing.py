@@ -1,5 +1,6 @@
 # >>>> </> STANDARD IMPORTS </>
 # >>>> ********************************************************************************
+import asyncio
 import logging
 import io
 # >>>> ********************************************************************************
@@ -10,15 +11,15 @@ from fastapi import APIRouter, HTTPException, Response
 from fastapi import status
 from fastapi.responses import UJSONResponse
 from pydantic import BaseModel
-import ujson as json
 # >>>> ********************************************************************************
 
 # >>>> </> LOCAL IMPORTS </>
 # >>>> ********************************************************************************
 from src_logging import log_config
-from src_processes.special_symbols_parsing import parse_special_symbols
-from settings import SPECIAL_SYMBOLS_CONF
-from src_utils.aws_utils import S3Utils
+from src_processes.pipelines import parse_special_symbols_pipeline
+from src_utils.aws_utils import S3FileOps
+from src_utils.executors import pipeline_executor
+from src_utils.wire_format import JSON_FORMAT, get_wire_format, encode_payload
 from .request_models import SpecialSymbolsParsingS3FilesData
 # >>>> ********************************************************************************
 
@@ -44,26 +45,9 @@ class Data(BaseModel):
                                 response_class=UJSONResponse,
                                 summary="Parse special symbols using SVG lines and convert them to text")
 async def parse_special_symbols_endpoint(data: Data) -> UJSONResponse:
-    lines = data.lines
-    parsed_text = data.parsed_text
-
-    parsed_text, pdf_width, pdf_height, changed_len = (parsed_text["parsed_text"],
-                                                       parsed_text["pdf_width"],
-                                                       parsed_text["pdf_height"],
-                                                       parsed_text["changed_len"])
-
-    svg_width, svg_height, lines = int(lines["svg_width"]), int(lines["svg_height"]), lines["lines_data"]
-    parsed_text = parse_special_symbols(parsed_text, lines,
-                                        pdf_width=pdf_width,
-                                        pdf_height=pdf_height,
-                                        svg_width=svg_width,
-                                        svg_height=svg_height,
-                                        triangle_symbol=SPECIAL_SYMBOLS_CONF["triangle"],
-                                        y_symbol=SPECIAL_SYMBOLS_CONF["y"])
-    parsed_text = {"parsed_text": parsed_text,
-                   "pdf_width": pdf_width,
-                   "pdf_height": pdf_height,
-                   "changed_len": changed_len}
+    parsed_text = await pipeline_executor.run_cpu_bound(parse_special_symbols_pipeline,
+                                                        parsed_text=data.parsed_text,
+                                                        lines=data.lines)
 
     return UJSONResponse(content=parsed_text)
 
@@ -78,57 +62,34 @@ async def parse_special_symbols_endpoint(data: Data) -> UJSONResponse:
 async def parse_special_symbols_endpoint_s3(files_data: SpecialSymbolsParsingS3FilesData) -> Response:
     # ________________________________________________________________________________
     # --- INIT S3 UTILS INSTANCE ---
-    s3 = S3Utils()
+    s3 = S3FileOps(s3_bucket_name=files_data.s3_bucket_name)
 
-    # --- DOWNLOAD LINES JSON FROM AWS S3 ---
-    lines_json_bytes = s3.download_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                            s3_file_key=files_data.files.lines_json.file_key)
-    lines_json_decoded = lines_json_bytes.getvalue().decode("utf-8")
-    lines_data = json.loads(lines_json_decoded)
-
-    # --- DOWNLOAD PARSED TEXT JSON FROM AWS S3 ---
-    parsed_text_json_bytes = s3.download_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                                  s3_file_key=files_data.files.parsed_text_json.file_key)
-    parsed_text_json_decoded = parsed_text_json_bytes.getvalue().decode("utf-8")
-    parsed_text_data = json.loads(parsed_text_json_decoded)
+    # --- DOWNLOAD LINES AND PARSED TEXT (JSON, MSGPACK OR NPZ BY FILE KEY EXTENSION) FROM AWS S3 CONCURRENTLY ---
+    lines_data, parsed_text_data = await asyncio.gather(
+        pipeline_executor.run_io_bound(s3.get_file_data,
+                                       s3_file_key=files_data.files.lines_json.file_key),
+        pipeline_executor.run_io_bound(s3.get_file_data,
+                                       s3_file_key=files_data.files.parsed_text_json.file_key))
 
     # ________________________________________________________________________________
     # --- PARSE SPECIAL SYMBOLS  ---
     # ________________________________________________________________________________
-    lines = lines_data
-    parsed_special_symbols = parsed_text_data
-
-    parsed_special_symbols, pdf_width, pdf_height, changed_len = (parsed_special_symbols["parsed_text"],
-                                                                  parsed_special_symbols["pdf_width"],
-                                                                  parsed_special_symbols["pdf_height"],
-                                                                  parsed_special_symbols["changed_len"])
-
-    svg_width, svg_height, lines = int(lines["svg_width"]), int(lines["svg_height"]), lines["lines_data"]
-
-    parsed_special_symbols = parse_special_symbols(parsed_text=parsed_special_symbols,
-                                                   lines=lines,
-                                                   pdf_width=pdf_width,
-                                                   pdf_height=pdf_height,
-                                                   svg_width=svg_width,
-                                                   svg_height=svg_height,
-                                                   triangle_symbol=SPECIAL_SYMBOLS_CONF["triangle"],
-                                                   y_symbol=SPECIAL_SYMBOLS_CONF["y"])
-
-    parsed_special_symbols = {"parsed_text": parsed_special_symbols,
-                              "pdf_width": pdf_width,
-                              "pdf_height": pdf_height,
-                              "changed_len": changed_len}
+    parsed_special_symbols = await pipeline_executor.run_cpu_bound(parse_special_symbols_pipeline,
+                                                                   parsed_text=parsed_text_data,
+                                                                   lines=lines_data)
     # ________________________________________________________________________________
 
-    # --- CONVERT JSON TO BYTES STREAM ---
-    json_payload = json.dumps(parsed_special_symbols)
-    json_byte_stream = io.BytesIO(json_payload.encode("utf-8"))
+    # --- ENCODE RESULT (JSON OR MSGPACK BY OUT FILE KEY EXTENSION) TO BYTES STREAM ---
+    out_payload = encode_payload(parsed_special_symbols, get_wire_format(filename=files_data.out_s3_file_key,
+                                                                         default=JSON_FORMAT))
+    json_byte_stream = io.BytesIO(out_payload)
 
     # --- UPLOAD FILE TO AWS S3 BUCKET ---
     try:
-        s3_upload_status = s3.upload_file_obj(s3_bucket_name=files_data.s3_bucket_name,
-                                              s3_file_key=files_data.out_s3_file_key,
-                                              file_byte_stream=json_byte_stream)
+        s3_upload_status = await pipeline_executor.run_io_bound(s3.upload_file_obj,
+                                                                s3_bucket_name=files_data.s3_bucket_name,
+                                                                s3_file_key=files_data.out_s3_file_key,
+                                                                file_byte_stream=json_byte_stream)
         if not s3_upload_status:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 detail=f"ERROR -> S3 upload status: {s3_upload_status}")
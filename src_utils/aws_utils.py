@@ -3,12 +3,14 @@
 # import asyncio
 import io
 import logging
+import threading
 # >>>> ********************************************************************************
 
 # >>>> </> EXTERNAL IMPORTS </>
 # >>>> ********************************************************************************
 import boto3
 # import aioboto3
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
 from fastapi import HTTPException, status
 import ujson as json
@@ -18,6 +20,7 @@ import ujson as json
 # >>>> ********************************************************************************
 import settings
 from src_logging import log_config
+from src_utils.wire_format import JSON_FORMAT, get_wire_format, decode_payload, encode_payload
 # >>>> ********************************************************************************
 
 # ________________________________________________________________________________
@@ -25,6 +28,59 @@ from src_logging import log_config
 logger = log_config.setup_logger(logger_name=__name__, logging_level=logging.DEBUG)
 
 
+# ________________________________________________________________________________
+# --- PROCESS-WIDE S3 CLIENTS ---
+_s3_clients: dict = {}
+_s3_clients_lock = threading.Lock()
+
+
+def get_s3_client(access_key: str = settings.AWS_ACCESS_KEY,
+                  secret_key: str = settings.AWS_SECRET_KEY,
+                  region_name: str = settings.AWS_REGION_NAME,
+                  endpoint_url: str = settings.S3_ENDPOINT_URL):
+    """
+    Return process-wide boto3 S3 client for the given credentials, create it on first use.
+    boto3 clients are thread-safe, so one client (and its HTTP connection pool) is shared by all requests.
+
+    Parameters:
+        access_key (str): AWS access key ID
+        secret_key (str): AWS secret access key
+        region_name (str): AWS region.
+        endpoint_url (str): Custom S3 endpoint (MinIO, moto server). None for AWS.
+
+    Returns:
+        botocore.client.S3: S3 client.
+    """
+    client_key = (access_key, secret_key, region_name, endpoint_url)
+
+    # - Client creation itself is not thread-safe -> guard it with the lock
+    with _s3_clients_lock:
+        if client_key not in _s3_clients:
+            _s3_clients[client_key] = boto3.client(
+                "s3",
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region_name,
+                endpoint_url=endpoint_url,
+                config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                              tcp_keepalive=settings.S3_TCP_KEEPALIVE,
+                              connect_timeout=settings.S3_CONNECT_TIMEOUT,
+                              read_timeout=settings.S3_READ_TIMEOUT,
+                              retries={"mode": settings.S3_RETRY_MODE,
+                                       "max_attempts": settings.S3_RETRY_MAX_ATTEMPTS}))
+            logger.info(f">>> S3 CLIENT CREATED - MAX POOL CONNECTIONS: {settings.S3_MAX_POOL_CONNECTIONS} <<<")
+
+        return _s3_clients[client_key]
+
+
+def reset_s3_clients() -> None:
+    """
+    Drop cached S3 clients (e.g. after changing credentials or endpoint in tests).
+    """
+    with _s3_clients_lock:
+        _s3_clients.clear()
+
+
 # ________________________________________________________________________________
 class S3Utils:
     """
@@ -33,19 +89,22 @@ class S3Utils:
     def __init__(self,
                  access_key: str = settings.AWS_ACCESS_KEY,
                  secret_key: str = settings.AWS_SECRET_KEY,
-                 region_name: str = settings.AWS_REGION_NAME):
+                 region_name: str = settings.AWS_REGION_NAME,
+                 endpoint_url: str = settings.S3_ENDPOINT_URL):
         """
         Initialize S3Utils instance with AWS credentials (access_key, secret_key), bucket name, and region.
+        The underlying S3 client is shared by all instances with the same credentials (see get_s3_client).
 
         Parameters:
             access_key (str): AWS access key ID
             secret_key (str): AWS secret access key
             region_name (str): AWS region. Defaults to 'us-east-1'.
+            endpoint_url (str): Custom S3 endpoint (MinIO, moto server). None for AWS.
         """
-        self.s3 = boto3.client("s3",
-                               aws_access_key_id=access_key,
-                               aws_secret_access_key=secret_key,
-                               region_name=region_name)
+        self.s3 = get_s3_client(access_key=access_key,
+                                secret_key=secret_key,
+                                region_name=region_name,
+                                endpoint_url=endpoint_url)
         # self.s3_session = aioboto3.Session(aws_access_key_id=access_key,
         #                                    aws_secret_access_key=secret_key,
         #                                    region_name=region_name)
@@ -65,7 +124,7 @@ class S3Utils:
         file_byte_stream = io.BytesIO()
 
         try:
-            logger.info(f"- Downloading file from S3 -")
+            logger.info("- Downloading file from S3 -")
             logger.info(f"- S3 bucket: {s3_bucket_name} - File key: {s3_file_key}")
             # - Download file as bytes into BytesIO stream
             self.s3.download_fileobj(s3_bucket_name,
@@ -164,6 +223,22 @@ class S3FileOps(S3Utils):
 
         return json_data
 
+    def get_file_data(self, s3_file_key: str):
+        """
+        Download JSON, msgpack or NPZ file (format by file key extension, JSON for other extensions)
+        from S3 bucket and return decoded data.
+
+        Parameters:
+            s3_file_key (str): File key for S3 object. Example: "sample/file/path.msgpack"
+
+        Returns:
+            dict: Decoded data.
+        """
+        wire_format = get_wire_format(filename=s3_file_key, default=JSON_FORMAT)
+        file_bytes = self.download_file_obj(s3_bucket_name=self.s3_bucket_name,
+                                            s3_file_key=s3_file_key)
+        return decode_payload(file_bytes.getvalue(), wire_format)
+
     def get_pdf_file_obj_bytes(self, s3_file_key: str) -> io.BytesIO:
         """
         Download PDF file from S3 bucket and return BytesIO stream.
@@ -197,4 +272,22 @@ class S3FileOps(S3Utils):
 
         if not upload_status:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                detail=f"ERROR -> Failed to upload JSON file to S3 bucket")
+                                detail="ERROR -> Failed to upload JSON file to S3 bucket")
+
+    def upload_file_data(self, s3_file_key: str, data):
+        """
+        Upload data to S3 bucket as JSON, msgpack or NPZ file (format by file key extension, JSON for other
+        extensions).
+
+        Parameters:
+            s3_file_key (str): File key for S3 object. Example: "sample/file/path.msgpack"
+            data (dict): Data to be uploaded.
+        """
+        wire_format = get_wire_format(filename=s3_file_key, default=JSON_FORMAT)
+        upload_status = self.upload_file_obj(file_byte_stream=io.BytesIO(encode_payload(data, wire_format)),
+                                             s3_bucket_name=self.s3_bucket_name,
+                                             s3_file_key=s3_file_key)
+
+        if not upload_status:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                detail="ERROR -> Failed to upload file to S3 bucket")
@@ -0,0 +1,271 @@
+import numpy as np
+
+from src_utils.spatial_index import TextSpatialIndex
+
+
+def _ranges(offsets: np.ndarray, idx: np.ndarray):
+    """
+    Concatenated index ranges [offsets[i], offsets[i + 1]) for i in idx and offsets of the result.
+    """
+    starts, ends = offsets[idx], offsets[idx + 1]
+    lengths = ends - starts
+    new_offsets = np.zeros(len(idx) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    positions = np.arange(new_offsets[-1], dtype=np.int64)
+    return positions - np.repeat(new_offsets[:-1] - starts, lengths), new_offsets
+
+
+class ColumnarTextBuilder:
+    """
+    Accumulates lines in the parsed text JSON shape (or spans of existing ColumnarText) and builds ColumnarText.
+    Strings (span messages, chars) and font names are interned.
+    """
+
+    def __init__(self):
+        self.strings, self._string_idx = [], {}
+        self.fonts, self._font_idx = [], {}
+
+        self.line_bbox, self.line_span_counts = [], []
+        self.span_bbox, self.span_size, self.span_color, self.span_font = [], [], [], []
+        self.span_message, self.span_meta, self.span_has_chars, self.span_char_counts = [], [], [], []
+        self.char_bbox, self.char_message = [], []
+
+    def _string(self, s: str) -> int:
+        idx = self._string_idx.get(s)
+        if idx is None:
+            idx = self._string_idx[s] = len(self.strings)
+            self.strings.append(s)
+        return idx
+
+    def _font(self, font: str) -> int:
+        idx = self._font_idx.get(font)
+        if idx is None:
+            idx = self._font_idx[font] = len(self.fonts)
+            self.fonts.append(font)
+        return idx
+
+    def add_span(self, span: dict) -> None:
+        self.span_bbox.append((span['x0'], span['y0'], span['x1'], span['y1']))
+        self.span_message.append(self._string(span['message']))
+        # - Spans made by crop_bbox_by_message_size have no font info and chars
+        meta = 'font' in span
+        self.span_meta.append(meta)
+        self.span_size.append(span['size'] if meta else np.nan)
+        self.span_color.append(span['color'] if meta else 0)
+        self.span_font.append(self._font(span['font']) if meta else -1)
+
+        chars = span.get('chars')
+        self.span_has_chars.append(chars is not None)
+        self.span_char_counts.append(len(chars) if chars else 0)
+        for char in chars or ():
+            self.char_bbox.append((char['x0'], char['y0'], char['x1'], char['y1']))
+            self.char_message.append(self._string(char['message']))
+
+    def add_line(self, line: dict) -> None:
+        self.line_bbox.append((line['x0'], line['y0'], line['x1'], line['y1']))
+        self.line_span_counts.append(len(line['spans']))
+        for span in line['spans']:
+            self.add_span(span)
+
+    def add_line_from_spans(self, text, span_idx) -> None:
+        """
+        Add line made of spans of ColumnarText, line bbox is the union of span bboxes.
+        """
+        bboxes = text.span_bbox[span_idx]
+        self.line_bbox.append((bboxes[:, 0].min(), bboxes[:, 1].min(), bboxes[:, 2].max(), bboxes[:, 3].max()))
+        self.line_span_counts.append(len(span_idx))
+        for s in span_idx:
+            self.add_span(text.span(s))
+
+    def build(self):
+        def offsets(counts):
+            result = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=result[1:])
+            return result
+
+        def bbox(values):
+            return np.asarray(values, dtype=np.float64).reshape(-1, 4)
+
+        return ColumnarText(line_bbox=bbox(self.line_bbox),
+                            line_span_offsets=offsets(self.line_span_counts),
+                            span_bbox=bbox(self.span_bbox),
+                            span_size=np.asarray(self.span_size, dtype=np.float64),
+                            span_color=np.asarray(self.span_color, dtype=np.int64),
+                            span_font=np.asarray(self.span_font, dtype=np.int32),
+                            span_message=np.asarray(self.span_message, dtype=np.int32),
+                            span_meta=np.asarray(self.span_meta, dtype=bool),
+                            span_has_chars=np.asarray(self.span_has_chars, dtype=bool),
+                            span_char_offsets=offsets(self.span_char_counts),
+                            char_bbox=bbox(self.char_bbox),
+                            char_message=np.asarray(self.char_message, dtype=np.int32),
+                            strings=self.strings,
+                            fonts=self.fonts)
+
+
+class ColumnarText:
+    """
+    Columnar representation of parsed text (list of lines {'spans': [{'chars': [...], ...}], 'x0', ...}):
+    NumPy arrays of line, span and char bboxes with span/char offsets, interned strings and font names.
+
+    Behaves like the list of lines where it is needed (len(), iteration and indexing return line dicts),
+    while table parsing functions (text_in_table, fix_text_bbox_vlines, get_rows) work on arrays directly.
+    """
+
+    def __init__(self, line_bbox, line_span_offsets,
+                 span_bbox, span_size, span_color, span_font, span_message, span_meta, span_has_chars,
+                 span_char_offsets, char_bbox, char_message, strings: list, fonts: list,
+                 spatial_index: TextSpatialIndex = None):
+        """
+        Parameters:
+            line_bbox (np.ndarray): (L, 4) line bboxes.
+            line_span_offsets (np.ndarray): (L + 1,) spans of line i are span_*[offsets[i]:offsets[i + 1]].
+            span_bbox (np.ndarray): (S, 4) span bboxes.
+            span_size, span_color, span_font (np.ndarray): (S,) font size, color and index in fonts.
+            span_message (np.ndarray): (S,) index of span text in strings.
+            span_meta (np.ndarray): (S,) False for spans without size, color and font.
+            span_has_chars (np.ndarray): (S,) False for spans without 'chars'.
+            span_char_offsets (np.ndarray): (S + 1,) chars of span j are char_*[offsets[j]:offsets[j + 1]].
+            char_bbox (np.ndarray): (C, 4) char bboxes.
+            char_message (np.ndarray): (C,) index of char in strings.
+            strings (list): Strings table.
+            fonts (list): Font names table.
+            spatial_index (TextSpatialIndex): Index over line bboxes, built on the first query if not given.
+        """
+        self.line_bbox = line_bbox
+        self.line_span_offsets = line_span_offsets
+        self.span_bbox = span_bbox
+        self.span_size = span_size
+        self.span_color = span_color
+        self.span_font = span_font
+        self.span_message = span_message
+        self.span_meta = span_meta
+        self.span_has_chars = span_has_chars
+        self.span_char_offsets = span_char_offsets
+        self.char_bbox = char_bbox
+        self.char_message = char_message
+        self.strings = strings
+        self.fonts = fonts
+        self._spatial_index = spatial_index
+
+    @property
+    def spatial_index(self) -> TextSpatialIndex:
+        if self._spatial_index is None:
+            self._spatial_index = TextSpatialIndex(self.line_bbox)
+        return self._spatial_index
+
+    def query(self, bbox, c=0) -> np.ndarray:
+        """
+        Indices (ascending) of lines lying strictly inside bbox enlarged by c (see TextSpatialIndex).
+        """
+        return self.spatial_index.query(bbox, c=c)
+
+    @classmethod
+    def from_parsed_text(cls, parsed_text: list):
+        if isinstance(parsed_text, cls):
+            return parsed_text
+        builder = ColumnarTextBuilder()
+        for line in parsed_text:
+            builder.add_line(line)
+        return builder.build()
+
+    def to_parsed_text(self) -> list:
+        return [self.line(i) for i in range(len(self))]
+
+    def __len__(self):
+        return len(self.line_bbox)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.line(i)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            i = int(item)
+            if i < 0:
+                i += len(self)
+            if not 0 <= i < len(self):
+                raise IndexError('ColumnarText index out of range')
+            return self.line(i)
+        return self.subset(np.arange(len(self))[item])
+
+    def span(self, s: int) -> dict:
+        x0, y0, x1, y1 = self.span_bbox[s].tolist()
+        d = {'x0': x0, 'y0': y0, 'x1': x1, 'y1': y1}
+        if self.span_meta[s]:
+            d['size'] = float(self.span_size[s])
+            d['color'] = int(self.span_color[s])
+            d['font'] = self.fonts[self.span_font[s]]
+        d['message'] = self.strings[self.span_message[s]]
+        if self.span_has_chars[s]:
+            start, end = self.span_char_offsets[s], self.span_char_offsets[s + 1]
+            d['chars'] = [{'message': self.strings[m], 'x0': x0, 'y0': y0, 'x1': x1, 'y1': y1}
+                          for m, (x0, y0, x1, y1) in zip(self.char_message[start:end].tolist(),
+                                                         self.char_bbox[start:end].tolist())]
+        return d
+
+    def line(self, i: int) -> dict:
+        x0, y0, x1, y1 = self.line_bbox[i].tolist()
+        spans = [self.span(s) for s in range(self.line_span_offsets[i], self.line_span_offsets[i + 1])]
+        return {'spans': spans, 'x0': x0, 'y0': y0, 'x1': x1, 'y1': y1}
+
+    def span_messages(self) -> list:
+        return [self.strings[m] for m in self.span_message.tolist()]
+
+    def line_messages(self, sep: str = ' ') -> list:
+        """
+        Line texts: span messages joined by sep.
+        """
+        messages = self.span_messages()
+        offsets = self.line_span_offsets.tolist()
+        return [sep.join(messages[offsets[i]:offsets[i + 1]]) for i in range(len(self))]
+
+    def inside(self, bboxes, c=0) -> np.ndarray:
+        """
+        Vectorized rectangle_inside_rectangle: which lines lie strictly inside bbox (enlarged by c).
+        For (B, 4) bboxes returns (B, L) mask, for a single bbox - (L,) mask.
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float64)
+        single = bboxes.ndim == 1
+        bboxes = bboxes.reshape(-1, 4)
+
+        min_x1 = np.minimum(bboxes[:, 0], bboxes[:, 2])[:, None] - c
+        max_x1 = np.maximum(bboxes[:, 0], bboxes[:, 2])[:, None] + c
+        min_y1 = np.minimum(bboxes[:, 1], bboxes[:, 3])[:, None] - c
+        max_y1 = np.maximum(bboxes[:, 1], bboxes[:, 3])[:, None] + c
+
+        lb = self.line_bbox
+        min_x2, max_x2 = np.minimum(lb[:, 0], lb[:, 2]), np.maximum(lb[:, 0], lb[:, 2])
+        min_y2, max_y2 = np.minimum(lb[:, 1], lb[:, 3]), np.maximum(lb[:, 1], lb[:, 3])
+
+        mask = (min_x2 > min_x1) & (min_y2 > min_y1) & (max_x2 < max_x1) & (max_y2 < max_y1)
+        return mask[0] if single else mask
+
+    def subset(self, line_idx) -> 'ColumnarText':
+        """
+        ColumnarText with the given lines (index array or boolean mask), strings and fonts tables are shared.
+        """
+        line_idx = np.asarray(line_idx)
+        if line_idx.dtype == bool:
+            line_idx = np.flatnonzero(line_idx)
+        line_idx = line_idx.astype(np.int64)
+        # - Index of query results (ascending lines) is derived from the parent index
+        spatial_index = self._spatial_index.subset(line_idx) \
+            if self._spatial_index is not None and np.all(np.diff(line_idx) > 0) else None
+
+        span_idx, line_span_offsets = _ranges(self.line_span_offsets, line_idx)
+        char_idx, span_char_offsets = _ranges(self.span_char_offsets, span_idx)
+        return ColumnarText(line_bbox=self.line_bbox[line_idx],
+                            line_span_offsets=line_span_offsets,
+                            span_bbox=self.span_bbox[span_idx],
+                            span_size=self.span_size[span_idx],
+                            span_color=self.span_color[span_idx],
+                            span_font=self.span_font[span_idx],
+                            span_message=self.span_message[span_idx],
+                            span_meta=self.span_meta[span_idx],
+                            span_has_chars=self.span_has_chars[span_idx],
+                            span_char_offsets=span_char_offsets,
+                            char_bbox=self.char_bbox[char_idx],
+                            char_message=self.char_message[char_idx],
+                            strings=self.strings,
+                            fonts=self.fonts,
+                            spatial_index=spatial_index)
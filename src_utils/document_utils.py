@@ -0,0 +1,144 @@
+# >>>> </> STANDARD IMPORTS </>
+# >>>> ********************************************************************************
+import asyncio
+import logging
+from typing import List, Optional
+# >>>> ********************************************************************************
+
+# >>>> </> EXTERNAL IMPORTS </>
+# >>>> ********************************************************************************
+from fastapi import HTTPException, status
+# >>>> ********************************************************************************
+
+# >>>> </> LOCAL IMPORTS </>
+# >>>> ********************************************************************************
+from src_logging import log_config
+from src_utils.aws_utils import S3FileOps
+from src_utils.executors import pipeline_executor
+# >>>> ********************************************************************************
+
+# ________________________________________________________________________________
+# --- INIT CONFIG - LOGGER SETUP ---
+logger = log_config.setup_logger(logger_name=__name__, logging_level=logging.DEBUG)
+
+PAGE_NUM_PLACEHOLDER: str = "{page_num}"
+
+
+# ________________________________________________________________________________
+def resolve_page_nums(page_count: int,
+                      page_nums: Optional[List[int]] = None,
+                      page_start: Optional[int] = None,
+                      page_end: Optional[int] = None) -> List[int]:
+    """
+    Resolve requested pages of the document: explicit page list or inclusive page_start/page_end range.
+
+    Parameters:
+        page_count (int): Number of pages in the PDF document.
+        page_nums (list): Explicit list of page numbers.
+        page_start (int): First page of the range. Defaults to the first page of the document.
+        page_end (int): Last page of the range (inclusive). Defaults to the last page of the document.
+
+    Returns:
+        list: Unique page numbers in the requested order.
+    """
+    if page_nums is None:
+        page_start = 0 if page_start is None else page_start
+        page_end = page_count - 1 if page_end is None else page_end
+        page_nums = list(range(page_start, page_end + 1))
+
+    page_nums = list(dict.fromkeys(page_nums))
+
+    if not page_nums:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="ERROR -> No pages requested.")
+
+    bad_pages = [page_num for page_num in page_nums if not 0 <= page_num < page_count]
+    if bad_pages:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"ERROR -> Pages {bad_pages} not found, document has {page_count} pages.")
+
+    return page_nums
+
+
+def page_file_key(file_key: str, page_num: int) -> str:
+    """
+    Substitute page number into the S3 file key with "{page_num}" placeholder.
+    """
+    return file_key.replace(PAGE_NUM_PLACEHOLDER, str(page_num))
+
+
+def page_out_file_key(out_s3_prefix: str, page_num: int) -> str:
+    """
+    Build S3 file key for the per-page result: {out_s3_prefix}/page_{page_num}.json
+    """
+    return f"{out_s3_prefix.rstrip('/')}/page_{page_num}.json"
+
+
+def check_out_s3_prefix(out_s3_prefix: Optional[str]) -> None:
+    if not out_s3_prefix:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="ERROR -> out_s3_prefix is required in document mode.")
+
+
+async def download_document_inputs(s3: S3FileOps, page_nums: List[int], json_file_keys: dict) -> list:
+    """
+    Download JSON (or msgpack/NPZ, by file key extension) inputs of every requested page from S3 in parallel.
+
+    Parameters:
+        s3 (S3FileOps): S3FileOps instance for the input bucket.
+        page_nums (list): Requested page numbers.
+        json_file_keys (dict): Input name -> S3 file key with "{page_num}" placeholder (None to skip the input).
+
+    Returns:
+        list: One dict per page: {'page_num': page_num, <input name>: <decoded data>, ...}
+    """
+    names = [name for name, file_key in json_file_keys.items() if file_key]
+
+    json_data = iter(await asyncio.gather(*[
+        pipeline_executor.run_io_bound(s3.get_file_data,
+                                       s3_file_key=page_file_key(json_file_keys[name], page_num))
+        for page_num in page_nums for name in names
+    ]))
+
+    return [{'page_num': page_num, **{name: next(json_data) for name in names}} for page_num in page_nums]
+
+
+async def upload_document_results(s3: S3FileOps, out_s3_prefix: str, page_results: list) -> dict:
+    """
+    Upload per-page results to S3 in parallel, then upload and return the manifest of the document.
+
+    Parameters:
+        s3 (S3FileOps): S3FileOps instance for the output bucket.
+        out_s3_prefix (str): S3 prefix for the per-page JSON files.
+        page_results (list): Per-page results of a document pipeline ({'page_num', 'result', 'error'}).
+
+    Returns:
+        dict: Manifest with S3 file key (or error) for every page.
+    """
+    uploaded_pages = [page_result for page_result in page_results if page_result['error'] is None]
+
+    await asyncio.gather(*[
+        pipeline_executor.run_io_bound(s3.upload_json_file_to_bucket,
+                                       s3_file_key=page_out_file_key(out_s3_prefix, page_result['page_num']),
+                                       data_for_json=page_result['result'])
+        for page_result in uploaded_pages
+    ])
+
+    manifest = {
+        'out_s3_prefix': out_s3_prefix,
+        'pages_total': len(page_results),
+        'pages_failed': len(page_results) - len(uploaded_pages),
+        'pages': [{'page_num': page_result['page_num'],
+                   'file_key': page_out_file_key(out_s3_prefix, page_result['page_num'])
+                   if page_result['error'] is None else None,
+                   'error': page_result['error']}
+                  for page_result in page_results]
+    }
+
+    await pipeline_executor.run_io_bound(s3.upload_json_file_to_bucket,
+                                         s3_file_key=f"{out_s3_prefix.rstrip('/')}/manifest.json",
+                                         data_for_json=manifest)
+    logger.info(f"- DOCUMENT RESULTS UPLOADED - PAGES: {manifest['pages_total']} "
+                f"- FAILED: {manifest['pages_failed']} -")
+
+    return manifest
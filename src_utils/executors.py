@@ -0,0 +1,214 @@
+# >>>> </> STANDARD IMPORTS </>
+# >>>> ********************************************************************************
+import asyncio
+import logging
+import functools
+from collections import deque
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+# >>>> ********************************************************************************
+
+# >>>> </> EXTERNAL IMPORTS </>
+# >>>> ********************************************************************************
+from fastapi import HTTPException, status
+# >>>> ********************************************************************************
+
+# >>>> </> LOCAL IMPORTS </>
+# >>>> ********************************************************************************
+import settings
+from src_logging import log_config
+from src_utils.wrappers import WarmProcessPool, warm_process_pool, WARM_UP_MODULES
+# >>>> ********************************************************************************
+
+# ________________________________________________________________________________
+# --- INIT CONFIG - LOGGER SETUP ---
+logger = log_config.setup_logger(logger_name=__name__, logging_level=logging.INFO)
+
+# - True in background jobs (see src_utils.jobs): CPU-bound pipelines wait for a free slot of the process pool
+#   instead of failing with 503 "Service is busy" which is meant for the request path
+wait_for_capacity: ContextVar[bool] = ContextVar("wait_for_capacity", default=False)
+
+
+# ________________________________________________________________________________
+class PipelineExecutor:
+    """
+    - PipelineExecutor class keeps CPU-bound parsing and blocking S3 I/O out of the event loop.
+    - CPU-bound pipelines run on a bounded pool of warm worker processes, boto3 calls run on a thread pool.
+    """
+    def __init__(self,
+                 process_pool: WarmProcessPool = warm_process_pool,
+                 queue_size: int = settings.PARALLEL_PROC_QUEUE_SIZE,
+                 proc_timeout: int = settings.PARALLEL_PROC_TIMEOUT,
+                 io_threads: int = settings.S3_IO_THREADS):
+        """
+        Initialize PipelineExecutor instance. Pools are created lazily on start() or on first use.
+
+        Parameters:
+            process_pool (WarmProcessPool): Pool of warm worker processes for CPU-bound pipelines.
+            queue_size (int): Number of pipelines allowed to wait for a free worker.
+            proc_timeout (int): Number of seconds to wait for a pipeline result.
+            io_threads (int): Number of threads for blocking I/O (boto3) calls.
+        """
+        self.max_workers: int = process_pool.nodes
+        self.queue_size: int = queue_size
+        self.proc_timeout: int = proc_timeout
+        self.io_threads: int = io_threads
+
+        self._process_pool: WarmProcessPool = process_pool
+        self._dispatch_pool: Optional[ThreadPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._pending: int = 0
+        self._slot_waiters: deque = deque()
+
+    def start(self) -> None:
+        """
+        Create process and thread pools if they are not running yet.
+        """
+        if self._dispatch_pool is None:
+            self._process_pool.start()
+            # - One dispatch thread per running or queued pipeline; each one waits for a free worker
+            self._dispatch_pool = ThreadPoolExecutor(max_workers=self.max_workers + self.queue_size,
+                                                     thread_name_prefix="proc_dispatch")
+            logger.info(f">>> PROCESS POOL STARTED - WORKERS: {self.max_workers} "
+                        f"- QUEUE SIZE: {self.queue_size} <<<")
+
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.io_threads,
+                                                   thread_name_prefix="io_worker")
+            logger.info(f">>> I/O THREAD POOL STARTED - THREADS: {self.io_threads} <<<")
+
+    def shutdown(self) -> None:
+        """
+        Shut down process and thread pools. Running tasks are cancelled where possible.
+        """
+        if self._dispatch_pool is not None:
+            self._dispatch_pool.shutdown(wait=False, cancel_futures=True)
+            self._dispatch_pool = None
+            self._process_pool.shutdown()
+
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+
+        logger.info(">>> PROCESS AND I/O THREAD POOLS SHUT DOWN <<<")
+
+    async def _acquire_slot(self) -> None:
+        # - Request path: fail fast with 503, background jobs: wait until a running pipeline releases its slot
+        while self._pending >= self.max_workers + self.queue_size:
+            if not wait_for_capacity.get():
+                logger.warning(f"ERROR -> Process pool is busy -> {self._pending} pipelines in progress.")
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                    detail="ERROR -> Service is busy, try again later.")
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._slot_waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._slot_waiters:
+                    self._slot_waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # - Woken up, but cancelled before taking the slot -> pass it to the next waiter
+                    self._wake_waiter()
+                raise
+        self._pending += 1
+
+    def _release(self, _future) -> None:
+        self._pending -= 1
+        self._wake_waiter()
+
+    def _wake_waiter(self) -> None:
+        while self._slot_waiters:
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def run_cpu_bound(self, func: Callable, *args, proc_timeout: Optional[int] = None, **kwargs):
+        """
+        Run CPU-bound function in the process pool and wait for the result without blocking the event loop.
+        When the pool and its queue are full, raises 503 on the request path and waits in background jobs.
+
+        Parameters:
+            func (Callable): Module-level (picklable) function to run.
+            *args: Positional arguments to be passed to the function.
+            proc_timeout (int): Number of seconds to wait for the result (executor default if None).
+            **kwargs: Keyword arguments to be passed to the function.
+
+        Returns:
+            Function execution result.
+        """
+        self.start()
+        proc_timeout = self.proc_timeout if proc_timeout is None else proc_timeout
+
+        await self._acquire_slot()
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._dispatch_pool,
+                                          functools.partial(self._process_pool.apply, func,
+                                                            args=args, kwargs=kwargs,
+                                                            proc_timeout=proc_timeout))
+        except Exception:
+            self._release(None)
+            raise
+
+        # - Slot is released only when the worker is really free, not when the caller stops waiting
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.shield(future)
+
+        except TimeoutError:
+            logger.error(f"ERROR -> TimeoutError -> {func.__name__} timed out after {proc_timeout} seconds.")
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                                detail=f"ERROR -> Processing timed out after {proc_timeout} seconds.")
+
+    async def map_pages(self, func: Callable, pages: list, **kwargs) -> list:
+        """
+        Split pages into one chunk per worker and run a document pipeline on every chunk in parallel.
+
+        Parameters:
+            func (Callable): Module-level (picklable) document pipeline, called as func(pages=chunk, **kwargs).
+            pages (list): Per-page items, each one is a dict with at least the "page_num" key.
+            **kwargs: Keyword arguments shared by all chunks (e.g. PDF bytes).
+
+        Returns:
+            list: Per-page results in the order of the input pages.
+        """
+        n_chunks = max(min(self.max_workers, len(pages)), 1)
+        # - Interleave pages between chunks -> heavy neighbouring sheets do not end up in one chunk
+        chunks = [pages[i::n_chunks] for i in range(n_chunks)]
+
+        chunk_results = await asyncio.gather(*[
+            self.run_cpu_bound(func, pages=chunk, proc_timeout=self.proc_timeout * len(chunk), **kwargs)
+            for chunk in chunks if chunk
+        ])
+
+        results = {page_result['page_num']: page_result
+                   for chunk_result in chunk_results for page_result in chunk_result}
+        return [results[page['page_num']] for page in pages]
+
+    async def run_io_bound(self, func: Callable, *args, **kwargs):
+        """
+        Run blocking I/O function (boto3 calls) in the thread pool.
+
+        Parameters:
+            func (Callable): Function to run.
+            *args: Positional arguments to be passed to the function.
+            **kwargs: Keyword arguments to be passed to the function.
+
+        Returns:
+            Function execution result.
+        """
+        self.start()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread_pool, functools.partial(func, *args, **kwargs))
+
+
+# ________________________________________________________________________________
+# --- PROCESS-WIDE EXECUTOR INSTANCE ---
+warm_process_pool.warm_up_modules = WARM_UP_MODULES + ("src_processes.pipelines",)
+pipeline_executor = PipelineExecutor()
@@ -17,6 +17,23 @@ def fix_coords(tags_coords):
     return xmin, ymin, xmax, ymax
 
 
+def fix_coords_array(bboxes):
+    # vectorized fix_coords for (N, 4) array of bboxes
+    return np.concatenate([np.minimum(bboxes[:, :2], bboxes[:, 2:]),
+                           np.maximum(bboxes[:, :2], bboxes[:, 2:])], axis=1)
+
+
+def transform_bboxes(bboxes, matrix, dtype=np.float32):
+    # apply fitz.Matrix (a, b, c, d, e, f) to both corners of (N, 4) array of bboxes,
+    # MuPDF transforms points in float32 -> same precision by default gives the same values as fitz.Point * Matrix
+    a, b, c, d, e, f = np.asarray(tuple(matrix), dtype=dtype)
+    x, y = bboxes[:, 0::2].astype(dtype), bboxes[:, 1::2].astype(dtype)
+    result = np.empty(bboxes.shape, dtype=dtype)
+    result[:, 0::2] = x * a + y * c + e
+    result[:, 1::2] = x * b + y * d + f
+    return result.astype(bboxes.dtype)
+
+
 def fix_coords_line(line):
     start, end = line[:2], line[2:]
     line = sorted([start, end])
@@ -46,6 +63,41 @@ def scale(line, original_size, new_size):
 
     return np.round(x0 * Rx), np.round(y0 * Ry), np.round(x1 * Rx), np.round(y1 * Ry)
 
+
+def normalize_lines(lines, original_size=None, new_size=None):
+    """
+    Vectorized preprocessing of raw lines (lines_data): scale (rounded to int) -> fix_coords_line ->
+    dedup -> drop lines with length 1 -> check_line_type.
+
+    Parameters:
+        lines (list): Lines [x0, y0, x1, y1].
+        original_size (tuple): (width, height) of lines space, e.g. SVG size. None - no scaling.
+        new_size (tuple): (width, height) to scale lines to, e.g. PDF size.
+
+    Returns:
+        tuple: (N, 4) array of unique lines (sorted), (N,) array of line types
+               ('horizontal', 'vertical' or 'other').
+    """
+    lines = np.asarray(lines).reshape(-1, 4)
+    if original_size and new_size:
+        ratio = np.array([new_size[0] / original_size[0], new_size[1] / original_size[1]] * 2)
+        lines = np.round(lines * ratio).astype(np.int64)
+
+    # - canonical order of points: start <= end (lexicographically)
+    x0, y0, x1, y1 = lines.T
+    swap = (x0 > x1) | ((x0 == x1) & (y0 > y1))
+    lines = np.where(swap[:, None], lines[:, [2, 3, 0, 1]], lines)
+
+    lines = np.unique(lines, axis=0)
+    x0, y0, x1, y1 = lines.T
+    lines = lines[np.sqrt((x0 - x1) ** 2 + (y0 - y1) ** 2) != 1]
+
+    x0, y0, x1, y1 = lines.T
+    line_types = np.select([(y0 == y1) & (x0 != x1), (x0 == x1) & (y0 != y1)],
+                           ['horizontal', 'vertical'], 'other')
+    return lines, line_types
+
+
 def make_bigger_bbox(coords, to_add=1):
     new_coords = []
     for i in coords:
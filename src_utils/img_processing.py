@@ -1,7 +1,17 @@
 import io
+import cv2
 from src_logging.log_config import setup_logger
 
 logger = setup_logger(__name__)
+
+
+def to_gray(img, color_conversion=cv2.COLOR_BGR2GRAY):
+    """
+    Convert image to grayscale. Single-channel images (e.g. rendered with fitz.csGRAY) are returned as is.
+    """
+    return img if img.ndim == 2 else cv2.cvtColor(img, color_conversion)
+
+
 def delete_objects(img, coords):
     for coord in coords:
         x_min, y_min, x_max, y_max = coord
@@ -0,0 +1,258 @@
+# >>>> </> STANDARD IMPORTS </>
+# >>>> ********************************************************************************
+import time
+import uuid
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+# >>>> ********************************************************************************
+
+# >>>> </> EXTERNAL IMPORTS </>
+# >>>> ********************************************************************************
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, status
+import ujson as json
+# >>>> ********************************************************************************
+
+# >>>> </> LOCAL IMPORTS </>
+# >>>> ********************************************************************************
+import settings
+from src_logging import log_config
+from src_utils.aws_utils import S3FileOps
+from src_utils.executors import pipeline_executor, wait_for_capacity
+# >>>> ********************************************************************************
+
+# ________________________________________________________________________________
+# --- INIT CONFIG - LOGGER SETUP ---
+logger = log_config.setup_logger(logger_name=__name__, logging_level=logging.INFO)
+
+JOB_STATUS_QUEUED: str = "queued"
+JOB_STATUS_RUNNING: str = "running"
+JOB_STATUS_SUCCEEDED: str = "succeeded"
+JOB_STATUS_FAILED: str = "failed"
+
+
+# ________________________________________________________________________________
+class JobStore(ABC):
+    """
+    - JobStore class is the interface of the storage for background job records.
+    - Job record is a plain JSON-serializable dict, see JobManager.submit().
+    """
+    @abstractmethod
+    async def save(self, job: dict) -> None:
+        """
+        Create or overwrite job record.
+        """
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[dict]:
+        """
+        Return job record or None if the job is not found.
+        """
+
+
+class InMemoryJobStore(JobStore):
+    """
+    - InMemoryJobStore class keeps job records in the memory of the current process.
+    - Works only when status is polled from the same process (local runs, single gunicorn worker).
+    """
+    def __init__(self, ttl: int = settings.JOB_STORE_TTL):
+        """
+        Parameters:
+            ttl (int): Number of seconds to keep finished job records.
+        """
+        self.ttl: int = ttl
+        self._jobs: dict = {}
+
+    def _purge_expired(self) -> None:
+        expired_before = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] is not None and job['finished_at'] < expired_before]:
+            del self._jobs[job_id]
+
+    async def save(self, job: dict) -> None:
+        self._purge_expired()
+        self._jobs[job['job_id']] = dict(job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+class S3JobStore(JobStore):
+    """
+    - S3JobStore class keeps job records as JSON files in S3: {prefix}/{job_id}.json
+    - Job status can be polled from any process or instance of the service.
+    """
+    def __init__(self,
+                 s3_bucket_name: str = settings.JOB_STORE_S3_BUCKET,
+                 prefix: str = settings.JOB_STORE_S3_PREFIX):
+        """
+        Parameters:
+            s3_bucket_name (str): S3 bucket for job records.
+            prefix (str): S3 prefix for job records.
+        """
+        self.prefix: str = prefix.rstrip("/")
+        self.s3 = S3FileOps(s3_bucket_name=s3_bucket_name)
+
+    def _file_key(self, job_id: str) -> str:
+        return f"{self.prefix}/{job_id}.json"
+
+    async def save(self, job: dict) -> None:
+        await pipeline_executor.run_io_bound(self.s3.upload_json_file_to_bucket,
+                                             s3_file_key=self._file_key(job['job_id']),
+                                             data_for_json=job)
+
+    def _get_job_record(self, job_id: str) -> Optional[dict]:
+        # - Only a missing record means "job not found", S3 outages and permission errors are raised
+        try:
+            response = self.s3.s3.get_object(Bucket=self.s3.s3_bucket_name, Key=self._file_key(job_id))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ("NoSuchKey", "404"):
+                return None
+            raise
+        return json.loads(response['Body'].read().decode("utf-8"))
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await pipeline_executor.run_io_bound(self._get_job_record, job_id)
+
+
+def get_job_store(store_type: str = settings.JOB_STORE) -> JobStore:
+    """
+    Create job store from settings: "memory" or "s3".
+    """
+    if store_type == "memory":
+        return InMemoryJobStore()
+    if store_type == "s3":
+        return S3JobStore()
+    raise ValueError(f"Unknown job store type: {store_type}")
+
+
+# ________________________________________________________________________________
+class JobManager:
+    """
+    - JobManager class runs S3 parsing coroutines in the background of the event loop.
+    - Number of running jobs is bounded by a semaphore, the rest wait in the queue.
+    """
+    def __init__(self,
+                 job_store: Optional[JobStore] = None,
+                 max_concurrent: int = settings.JOBS_MAX_CONCURRENT,
+                 queue_size: int = settings.JOBS_QUEUE_SIZE):
+        """
+        Parameters:
+            job_store (JobStore): Storage for job records. Created from settings if None.
+            max_concurrent (int): Number of jobs running at the same time.
+            queue_size (int): Number of jobs allowed to wait for a free slot.
+        """
+        self.job_store: JobStore = job_store or get_job_store()
+        self.max_concurrent: int = max_concurrent
+        self.queue_size: int = queue_size
+
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        # - Strong references to running tasks -> tasks are not garbage collected before they finish
+        self._tasks: set = set()
+
+    async def submit(self, job_type: str, job_func: Callable[..., Awaitable], request_data: dict,
+                     result_file_key: Optional[str] = None, **kwargs) -> dict:
+        """
+        Create job record and schedule job function in the background.
+
+        Parameters:
+            job_type (str): Job type, e.g. "parse-text-s3".
+            job_func (Callable): Coroutine function that does the job, called as job_func(**kwargs).
+                                 Returns JSON-serializable result or None.
+            request_data (dict): Request body, stored in the job record.
+            result_file_key (str): S3 file key (or prefix) where the job writes its result.
+            **kwargs: Keyword arguments to be passed to the job function.
+
+        Returns:
+            dict: Job record.
+        """
+        if len(self._tasks) >= self.max_concurrent + self.queue_size:
+            logger.warning(f"ERROR -> Job queue is full -> {len(self._tasks)} jobs in progress.")
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="ERROR -> Job queue is full, try again later.")
+
+        job = {'job_id': uuid.uuid4().hex,
+               'job_type': job_type,
+               'status': JOB_STATUS_QUEUED,
+               'request': request_data,
+               'result_file_key': result_file_key,
+               'result': None,
+               'error': None,
+               'created_at': time.time(),
+               'started_at': None,
+               'finished_at': None}
+        await self.job_store.save(job)
+
+        task = asyncio.create_task(self._run(job, job_func, **kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        logger.info(f"- JOB SUBMITTED - {job_type} - JOB ID: {job['job_id']} -")
+        return job
+
+    async def _run(self, job: dict, job_func: Callable[..., Awaitable], **kwargs) -> None:
+        # - Pipelines of background jobs wait for free process pool slots instead of failing with 503
+        wait_for_capacity.set(True)
+        try:
+            async with self._semaphore:
+                job.update(status=JOB_STATUS_RUNNING, started_at=time.time())
+                await self.job_store.save(job)
+
+                try:
+                    job.update(status=JOB_STATUS_SUCCEEDED, result=await job_func(**kwargs))
+                except HTTPException as e:
+                    job.update(status=JOB_STATUS_FAILED, error=e.detail)
+                except Exception as e:
+                    logger.error(f"ERROR -> Job {job['job_id']} failed: {e}")
+                    job.update(status=JOB_STATUS_FAILED, error=str(e))
+
+                job.update(finished_at=time.time())
+                await self._save_final(job)
+
+                logger.info(f"- JOB FINISHED - {job['job_type']} - JOB ID: {job['job_id']} - "
+                            f"STATUS: {job['status']} -")
+
+        except asyncio.CancelledError:
+            # - Queued or running job cancelled on shutdown -> final state for clients polling the job status
+            logger.warning(f"- JOB CANCELLED - {job['job_type']} - JOB ID: {job['job_id']} -")
+            job.update(status=JOB_STATUS_FAILED, error="ERROR -> Job cancelled on shutdown.",
+                       finished_at=time.time())
+            await self._save_final(job)
+            raise
+
+    async def _save_final(self, job: dict) -> None:
+        # - Best effort: job is finished anyway, failed save is only logged
+        try:
+            await self.job_store.save(job)
+        except Exception as e:
+            logger.error(f"ERROR -> Failed to save job {job['job_id']}: {e}")
+
+    async def get(self, job_id: str) -> dict:
+        """
+        Return job record.
+
+        Raises:
+            HTTPException: 404 if the job is not found.
+        """
+        job = await self.job_store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"ERROR -> Job {job_id} not found.")
+        return job
+
+    async def shutdown(self) -> None:
+        """
+        Cancel running and queued jobs and wait until they save their final (failed) state.
+        """
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ________________________________________________________________________________
+# --- PROCESS-WIDE JOB MANAGER INSTANCE ---
+job_manager = JobManager()
@@ -1,35 +1,65 @@
-import networkx as nx
 from itertools import chain
 from src_utils.geometry_utils import is_part_of_other, check_line_type
 
-def merge_small_lines(lines, line_type):
-    # define graph
-    G = nx.Graph()
-    for i, line in enumerate(lines):
-        G.add_node(i)
-    # add edges
+
+def _is_connected(line1, line2, line_type):
+    start1, end1 = line1[:2], line1[2:]
+    start2, end2 = line2[:2], line2[2:]
+    return start1 == end2 or start2 == end1 or \
+        is_part_of_other(line1, line2, line_type) \
+        or is_part_of_other(line2, line1, line_type) \
+        or start1 == start2 or end1 == end2
+
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def _connected_components(lines, line_type):
+    # union-find over lines connected by _is_connected
+    parents = list(range(len(lines)))
+    # axis of the line position and of the line extent
+    pos, start, end = (1, 0, 2) if line_type == 'horizontal' else (0, 1, 3)
+    if all(check_line_type(line) == line_type and line[start] <= line[end] for line in lines):
+        # lines on one horizontal (vertical) are connected iff their closed intervals intersect ->
+        # bucket by y (x) and sweep intervals sorted by start
+        buckets = {}
+        for i, line in enumerate(lines):
+            buckets.setdefault(line[pos], []).append(i)
+        for bucket in buckets.values():
+            bucket.sort(key=lambda i: lines[i][start])
+            root, reach = bucket[0], lines[bucket[0]][end]
+            for i in bucket[1:]:
+                if lines[i][start] <= reach:
+                    parents[i] = root
+                    reach = max(reach, lines[i][end])
+                else:
+                    root, reach = i, lines[i][end]
+    else:
+        # - not normalized lines: pairwise check
+        for i in range(len(lines)):
+            for j in range(i + 1, len(lines)):
+                if _is_connected(lines[i], lines[j], line_type):
+                    parents[_find(parents, i)] = _find(parents, j)
+
+    components = {}
     for i in range(len(lines)):
-        start1, end1 = lines[i][:2], lines[i][2:]
-        for j in range(i + 1, len(lines)):
-            start2, end2 = lines[j][:2], lines[j][2:]
-            if start1 == end2 or start2 == end1 or \
-                    is_part_of_other(lines[i], lines[j], line_type) \
-                    or is_part_of_other(lines[j], lines[i], line_type) \
-                    or start1 == start2 or end1 == end2:
-                G.add_edge(i, j)
+        components.setdefault(_find(parents, i), []).append(i)
+    # components in order of their first line
+    return sorted(components.values(), key=lambda component: component[0])
+
+
+def merge_small_lines(lines, line_type):
     # get big_lines
     big_lines = []
-    to_del = []
-    for component in nx.connected_components(G):
-        big_line = []
-        to_del_tmp = []
-        for node in component:
-            big_line.append(lines[node])
-            to_del_tmp.append(node)
-
-        if len(big_line) > 1:
-            to_del.extend(to_del_tmp)
-            big_lines.append(big_line)
+    to_del = set()
+    for component in _connected_components(lines, line_type):
+        if len(component) > 1:
+            to_del.update(component)
+            big_lines.append([lines[node] for node in component])
 
     # get minimal and maximal point for each line
     actual_lines = []
@@ -48,7 +78,3 @@ def merge_small_lines_all(lines):
     h_lines = [i for i in lines if check_line_type(i) == 'horizontal']
     return merge_small_lines(h_lines, line_type='horizontal') \
            + merge_small_lines(v_lines, line_type='vertical') + o_lines
-
-
-
-
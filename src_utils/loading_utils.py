@@ -2,10 +2,23 @@ import fitz
 import PIL.Image as pil_image
 import numpy as np
 from src_logging.log_config import setup_logger
+from src_utils.raster_cache import raster_cache, content_hash
 
 logger = setup_logger(__name__)
 
 
+def open_pdf(pdf_bytes: bytes):
+    """
+    Open PDF document from bytes and tag it with content hash (key of the rendered rasters cache).
+
+    Parameters:
+        pdf_bytes (bytes): PDF file content.
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    doc.content_hash = content_hash(pdf_bytes)
+    return doc
+
+
 def load_pdf(pdf_file_obj, page_num: int = 0, s3_origin: bool = False):
     """
     Load PDF file from file object.
@@ -16,20 +29,94 @@ def load_pdf(pdf_file_obj, page_num: int = 0, s3_origin: bool = False):
         s3_origin (bool): If True, then pdf_file_obj is a BytesIO object from S3.
     """
     if s3_origin:
-        doc = fitz.open(stream=pdf_file_obj,
-                        filetype="pdf")
+        doc = open_pdf(pdf_file_obj)
     else:
-        doc = fitz.open(stream=pdf_file_obj.file.read(),
-                        filetype="pdf")
-    page = doc[page_num]
-    pix = page.get_pixmap()
-    pdf_size = (pix.width, pix.height)
-    img = pil_image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-    img_array = np.array(img)
+        doc = open_pdf(pdf_file_obj.file.read())
+    page, img_array, pdf_size = load_page(doc, page_num)
     return doc, page, img_array, pdf_size
 
 
+def load_page(doc, page_num: int = 0):
+    """
+    Load page and its image from already opened PDF document.
+
+    Parameters:
+        doc (fitz.Document): Opened PDF document.
+        page_num (int): Page number to load.
+    """
+    page = doc[page_num]
+    img_array = render_page(page)
+    pdf_size = (img_array.shape[1], img_array.shape[0])
+    return page, img_array, pdf_size
+
+
+class PixmapArray(np.ndarray):
+    """
+    NumPy view of fitz.Pixmap samples without copying. The view keeps a reference to the pixmap,
+    because the underlying memory belongs to the pixmap and is freed together with it.
+    """
+
+    def __array_finalize__(self, obj):
+        # - Views (slices) share the pixmap memory -> keep the reference; copies own their data
+        self.pixmap = getattr(obj, 'pixmap', None) if self.base is not None else None
+
+
+def pixmap_to_array(pix):
+    """
+    Expose pixmap buffer as (height, width, n) uint8 array, or (height, width) for grayscale pixmaps.
+
+    Parameters:
+        pix (fitz.Pixmap): Rendered pixmap.
+    """
+    if pix.n == 1:
+        shape, strides = (pix.height, pix.width), (pix.stride, 1)
+    else:
+        shape, strides = (pix.height, pix.width, pix.n), (pix.stride, pix.n, 1)
+
+    img_array = np.ndarray(shape=shape, dtype=np.uint8, buffer=pix.samples_mv, strides=strides).view(PixmapArray)
+    img_array.pixmap = pix
+    return img_array
+
+
+def render_page(page, dpi: int = None, gray: bool = False, clip=None, cache: bool = True):
+    """
+    Render page (or its region) to RGB (or grayscale) image array. Rasters of documents opened with open_pdf()
+    are cached by (content hash, page number, DPI, colorspace, clip), so every region is rendered once per DPI.
+    Returned array is a read-only view of the pixmap, copy it before drawing on it.
+
+    Parameters:
+        page (fitz.Page): PDF page.
+        dpi (int): Rendering resolution. None - default 72 DPI (1 pixel per PDF point).
+        gray (bool): Render straight to single-channel grayscale (fitz.csGRAY).
+        clip (tuple): Region to render (x0, y0, x1, y1) in page coordinates, i.e. pixels of the 72 DPI raster.
+                      None - the whole page.
+        cache (bool): Use raster cache. False for one-off renders (e.g. OCR crops of spans), which would only
+                      evict page rasters and fill the disk tier with tiny files.
+    """
+    if clip is not None:
+        clip = tuple(clip)
+
+    doc_hash = getattr(page.parent, 'content_hash', None) if cache else None
+    if doc_hash is not None:
+        key = raster_cache.make_key(doc_hash, page.number, dpi or 72, 'gray' if gray else 'rgb',
+                                    *(clip if clip is not None else ()))
+        img_array = raster_cache.get(key)
+        if img_array is not None:
+            return img_array
+
+    pix = page.get_pixmap(dpi=dpi or 72,
+                          colorspace=fitz.csGRAY if gray else fitz.csRGB,
+                          clip=fitz.Rect(clip) if clip is not None else None)
+    img_array = pixmap_to_array(pix)
+
+    if doc_hash is not None:
+        img_array = raster_cache.put(key, img_array)
+    else:
+        img_array.flags.writeable = False
+    return img_array
+
+
 def load_image_from_page(page):
-    pixmap = page.get_pixmap()
-    img = pil_image.frombytes("RGB", [pixmap.width, pixmap.height], pixmap.samples)
-    return img, pixmap.width, pixmap.height
+    img_array = render_page(page)
+    img = pil_image.fromarray(img_array)
+    return img, img_array.shape[1], img_array.shape[0]
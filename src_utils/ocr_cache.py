@@ -0,0 +1,134 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import settings
+from src_logging.log_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def crop_hash(crop, ocr_config: str = '') -> str:
+    """
+    Exact hash of grayscale span crop (PIL image) and OCR config, used as the OCR cache key.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f'{crop.mode}_{crop.width}_{crop.height}_{ocr_config}'.encode('utf-8'))
+    h.update(crop.tobytes())
+    return h.hexdigest()
+
+
+class OcrCache:
+    """
+    Two-tier cache of recognized text keyed by span crop hash (see crop_hash).
+
+    - Memory tier: LRU with a bounded number of entries.
+    - Disk tier (optional): SQLite database, which can be shared by all worker processes,
+      so a glyph recognized on one sheet is not sent to tesseract again on the next one.
+    """
+
+    def __init__(self, max_entries: int, db_path: str = None, disk_max_entries: int = 0):
+        """
+        Parameters:
+            max_entries (int): Number of entries of the in-memory tier. 0 disables the tier.
+            db_path (str): SQLite database file. None disables the disk tier.
+            disk_max_entries (int): Disk tier size, the least recently used entries are removed when
+                                    it is exceeded. 0 - no limit.
+        """
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.disk_max_entries = disk_max_entries
+
+        self._texts = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._puts = 0
+
+    def _db(self):
+        # - Connection is opened lazily in every worker process
+        if self._conn is None or self._conn_pid != os.getpid():
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS ocr_cache '
+                               '(key TEXT PRIMARY KEY, text TEXT NOT NULL, last_used REAL NOT NULL)')
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str):
+        """
+        Return cached text or None.
+        """
+        with self._lock:
+            text = self._texts.get(key)
+            if text is not None:
+                self._texts.move_to_end(key)
+                return text
+
+            if self.db_path:
+                try:
+                    db = self._db()
+                    row = db.execute('SELECT text FROM ocr_cache WHERE key = ?', (key,)).fetchone()
+                    if row is not None:
+                        with db:
+                            db.execute('UPDATE ocr_cache SET last_used = ? WHERE key = ?', (time.time(), key))
+                except sqlite3.Error as e:
+                    logger.warning(f'Failed to read OCR cache: {e}')
+                    return None
+                if row is not None:
+                    self._put_memory(key, row[0])
+                    return row[0]
+
+        return None
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Store recognized text in the cache.
+        """
+        with self._lock:
+            self._put_memory(key, text)
+
+            if self.db_path:
+                try:
+                    db = self._db()
+                    with db:
+                        db.execute('INSERT OR REPLACE INTO ocr_cache (key, text, last_used) VALUES (?, ?, ?)',
+                                   (key, text, time.time()))
+                    self._puts += 1
+                    # - Trimming needs a full count -> do it once per 100 inserts
+                    if self.disk_max_entries and self._puts % 100 == 0:
+                        self._trim_disk(db)
+                except sqlite3.Error as e:
+                    logger.warning(f'Failed to write OCR cache: {e}')
+
+    def _put_memory(self, key: str, text: str) -> None:
+        if not self.max_entries:
+            return
+        self._texts[key] = text
+        self._texts.move_to_end(key)
+        while len(self._texts) > self.max_entries:
+            self._texts.popitem(last=False)
+
+    def _trim_disk(self, db) -> None:
+        count = db.execute('SELECT COUNT(*) FROM ocr_cache').fetchone()[0]
+        if count > self.disk_max_entries:
+            with db:
+                db.execute('DELETE FROM ocr_cache WHERE key IN '
+                           '(SELECT key FROM ocr_cache ORDER BY last_used LIMIT ?)',
+                           (count - self.disk_max_entries,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._texts.clear()
+
+
+# Process-wide cache instance (every worker process has its own memory tier)
+ocr_cache = OcrCache(max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+                     db_path=settings.OCR_CACHE_PATH,
+                     disk_max_entries=settings.OCR_CACHE_DISK_MAX_ENTRIES)
@@ -1,7 +1,6 @@
-import numpy as np
-import PIL.Image as pil_image
 import cv2
 import random
+from src_utils.loading_utils import render_page
 
 
 def plot_one_box(img, coord, label=None, color=None, line_thickness=None):
@@ -26,10 +25,8 @@ def plot_one_box(img, coord, label=None, color=None, line_thickness=None):
 
 
 def plot_extracted_messages(page, objects_to_draw):
-    pix = page.get_pixmap()
-    image = pil_image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-
-    image = np.asarray(image)
+    # - cached raster is read-only -> draw on a copy
+    image = render_page(page).copy()
     for inner_object in objects_to_draw:
         tmp_obj_rect = [inner_object['x0'], inner_object['y0'],
                         inner_object['x1'], inner_object['y1']]
@@ -0,0 +1,153 @@
+import os
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import settings
+from src_logging.log_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def content_hash(pdf_bytes: bytes) -> str:
+    """
+    Hash of PDF file content, used as a part of the raster cache key.
+    """
+    return hashlib.blake2b(pdf_bytes, digest_size=16).hexdigest()
+
+
+class RasterCache:
+    """
+    Two-tier cache of rendered page rasters keyed by (PDF content hash, page number, DPI, ...).
+
+    - Memory tier: LRU with a byte budget. Arrays are stored read-only, callers copy before drawing on them.
+    - Disk tier (optional): one .npy file per raster, memory-mapped on read. The directory can be shared
+      by all worker processes, so a page rendered by one endpoint is reused by the next one.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str = None, disk_max_bytes: int = 0):
+        """
+        Parameters:
+            max_bytes (int): Memory budget of the in-memory tier. 0 disables the tier.
+            disk_dir (str): Directory for .npy files. None disables the disk tier.
+            disk_max_bytes (int): Disk budget, the oldest files are removed when it is exceeded. 0 - no limit.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._arrays = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return '_'.join(str(part) for part in parts)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f'{key}.npy')
+
+    def get(self, key: str):
+        """
+        Return cached raster or None.
+        """
+        with self._lock:
+            arr = self._arrays.get(key)
+            if arr is not None:
+                self._arrays.move_to_end(key)
+                return arr
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                arr = np.load(path, mmap_mode='r')
+                # - Touch the file -> disk tier is trimmed in least recently used order
+                os.utime(path)
+            except (ValueError, OSError):
+                return None
+            # - Memory-mapped array is returned as is, pages are loaded by the OS on access
+            return arr
+
+        return None
+
+    def put(self, key: str, arr: np.ndarray) -> np.ndarray:
+        """
+        Store raster in the cache and return the read-only array that is kept there.
+        """
+        arr.flags.writeable = False
+        self._put_memory(key, arr)
+        if self.disk_dir:
+            self._put_disk(key, arr)
+        return arr
+
+    def _put_memory(self, key: str, arr: np.ndarray) -> None:
+        size = arr.nbytes
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._arrays:
+                return
+            self._arrays[key] = arr
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._arrays.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def _put_disk(self, key: str, arr: np.ndarray) -> None:
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+
+        # - Write to a temporary file and rename -> other processes never read a partially written file
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, arr)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f'Failed to write raster to disk cache: {e}')
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        if self.disk_max_bytes:
+            self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.npy'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # - Removed by another worker process in the meantime
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._arrays.clear()
+            self._bytes = 0
+
+
+# Process-wide cache instance (every worker process has its own memory tier)
+raster_cache = RasterCache(max_bytes=settings.RASTER_CACHE_MAX_BYTES,
+                           disk_dir=settings.RASTER_CACHE_DIR,
+                           disk_max_bytes=settings.RASTER_CACHE_DISK_MAX_BYTES)
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class TextSpatialIndex:
+    """
+    Sorted interval index over text bboxes for "which items lie strictly inside region" queries
+    (same semantics as rectangle_inside_rectangle). Items are sorted by their left x, so a query only
+    checks items whose left x lies inside the region x range: O(log n + k) instead of a scan over all items.
+    """
+
+    def __init__(self, bboxes):
+        """
+        Parameters:
+            bboxes (np.ndarray): (N, 4) item bboxes (x0, y0, x1, y1), corners in any order.
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        self.min_x = np.minimum(bboxes[:, 0], bboxes[:, 2])
+        self.max_x = np.maximum(bboxes[:, 0], bboxes[:, 2])
+        self.min_y = np.minimum(bboxes[:, 1], bboxes[:, 3])
+        self.max_y = np.maximum(bboxes[:, 1], bboxes[:, 3])
+        self.order = np.argsort(self.min_x, kind='stable')
+        self.sorted_min_x = self.min_x[self.order]
+
+    @classmethod
+    def from_items(cls, items: list):
+        """
+        Build index over parsed text items (dicts with 'x0', 'y0', 'x1', 'y1').
+        """
+        return cls([(i['x0'], i['y0'], i['x1'], i['y1']) for i in items])
+
+    def __len__(self):
+        return len(self.min_x)
+
+    def query(self, bbox, c=0) -> np.ndarray:
+        """
+        Indices (ascending) of items lying strictly inside bbox enlarged by c.
+        """
+        min_x1 = min(bbox[0], bbox[2]) - c
+        max_x1 = max(bbox[0], bbox[2]) + c
+        min_y1 = min(bbox[1], bbox[3]) - c
+        max_y1 = max(bbox[1], bbox[3]) + c
+
+        # - min_x > min_x1 and (min_x <= max_x < max_x1) -> slice of items sorted by min_x
+        lo = np.searchsorted(self.sorted_min_x, min_x1, side='right')
+        hi = np.searchsorted(self.sorted_min_x, max_x1, side='left')
+        candidates = self.order[lo:hi]
+
+        mask = (self.max_x[candidates] < max_x1) & \
+               (self.min_y[candidates] > min_y1) & (self.max_y[candidates] < max_y1)
+        return np.sort(candidates[mask])
+
+    def subset(self, idx) -> 'TextSpatialIndex':
+        """
+        Index over items idx (ascending) renumbered 0..len(idx) - 1, without sorting again.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        keep = np.zeros(len(self), dtype=bool)
+        keep[idx] = True
+        new_numbers = np.cumsum(keep) - 1
+
+        index = TextSpatialIndex.__new__(TextSpatialIndex)
+        index.min_x, index.max_x = self.min_x[idx], self.max_x[idx]
+        index.min_y, index.max_y = self.min_y[idx], self.max_y[idx]
+        index.order = new_numbers[self.order[keep[self.order]]]
+        index.sorted_min_x = index.min_x[index.order]
+        return index
+
+
+class IndexedText:
+    """
+    Parsed text items (lines {'spans': [...], 'x0', ...}) with a spatial index. Behaves like the read-only
+    list of items where it is needed (len(), iteration and indexing), text_in_table queries go through
+    the index and return IndexedText of found items (index of the subset is derived, not rebuilt).
+    Items are held in a private list, so the index can not go stale by list changes, after changing bboxes
+    of items in place call invalidate_spatial_index().
+    """
+
+    def __init__(self, items=(), spatial_index: TextSpatialIndex = None):
+        """
+        Parameters:
+            items (list): Parsed text items.
+            spatial_index (TextSpatialIndex): Index over item bboxes, built on the first query if not given.
+        """
+        self._items = list(items)
+        self._spatial_index = spatial_index
+
+    @property
+    def spatial_index(self) -> TextSpatialIndex:
+        if self._spatial_index is None:
+            self._spatial_index = TextSpatialIndex.from_items(self._items)
+        return self._spatial_index
+
+    def invalidate_spatial_index(self) -> None:
+        """
+        Drop the index after bboxes of items were changed in place.
+        """
+        self._spatial_index = None
+
+    def query(self, bbox, c=0) -> 'IndexedText':
+        spatial_index = self.spatial_index
+        idx = spatial_index.query(bbox, c=c)
+        return IndexedText([self._items[i] for i in idx.tolist()], spatial_index.subset(idx))
+
+    def to_list(self) -> list:
+        return list(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return IndexedText(self._items[item])
+        return self._items[item]
+
+    def __repr__(self):
+        return f'IndexedText({self._items!r})'
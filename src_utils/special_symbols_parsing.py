@@ -1,93 +1,264 @@
+from bisect import bisect_left, bisect_right
 from src_utils.geometry_utils import get_line_length, check_line_type
+from src_logging.log_config import setup_logger
 
+logger = setup_logger(__name__)
 
-def find_triangles(horizontal_lines, vertical_lines, inclined_lines):
+
+class LinesEndpointIndex:
+    """
+    Endpoint graph of lines: hash index of lines by their endpoints (and midpoints), lines starting or ending
+    at a point are found in O(1) instead of a scan over all lines. Built once per page and shared by
+    all special symbol detectors.
+    """
+
+    def __init__(self, lines, line_types=None):
+        """
+        Parameters:
+            lines (list): Lines (x0, y0, x1, y1).
+            line_types (list): Types of lines (check_line_type), computed if not given.
+        """
+        self.lines = list(lines)
+        self.line_types = list(line_types) if line_types is not None else [check_line_type(i) for i in self.lines]
+        self._index = {}
+        self._midpoints = {}
+        for i, line in enumerate(self.lines):
+            self._index.setdefault(tuple(line[:2]), []).append(i)
+            if tuple(line[2:]) != tuple(line[:2]):
+                self._index.setdefault(tuple(line[2:]), []).append(i)
+            self._midpoints.setdefault(self._midpoint_key(line), []).append(i)
+
+    @staticmethod
+    def _midpoint_key(line):
+        return round((line[0] + line[2]) / 2), round((line[1] + line[3]) / 2)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def adjacent(self, *points) -> list:
+        """
+        Indices (ascending) of lines with start or end at any of points.
+        """
+        if len(points) == 1:
+            return self._index.get(tuple(points[0]), [])
+        return sorted(set().union(*[self._index.get(tuple(point), []) for point in points]))
+
+    def arms(self, point, line_types=None) -> list:
+        """
+        Lines (ascending index) with start or end at point, oriented to start at point: the line itself
+        if it starts at point, otherwise reversed [x1, y1, x0, y0]. line_types - keep only lines of these types.
+        """
+        arms = []
+        for i in self.adjacent(point):
+            if line_types and self.line_types[i] not in line_types:
+                continue
+            line = self.lines[i]
+            arms.append(line if tuple(line[:2]) == tuple(point) else [*line[2:], *line[:2]])
+        return arms
+
+    def at_midpoint(self, point, line_type=None) -> list:
+        """
+        Lines (ascending index) with midpoint at point (both rounded to int).
+        """
+        return [self.lines[i] for i in self._midpoints.get((round(point[0]), round(point[1])), [])
+                if line_type is None or self.line_types[i] == line_type]
+
+
+class SymbolDetector:
+    """
+    Special symbol declared by its line topology: type of the base line and a matcher which checks lines
+    around the base through the endpoint graph (LinesEndpointIndex).
+    """
+
+    def __init__(self, name: str, base_type: str, match):
+        """
+        Parameters:
+            name (str): Symbol name, key of settings.SPECIAL_SYMBOLS_CONF.
+            base_type (str): Type of base lines: 'horizontal', 'vertical' or 'other'.
+            match (callable): match(base_line, endpoint_index) -> lines of the symbol or None.
+        """
+        self.name = name
+        self.base_type = base_type
+        self.match = match
+
+
+# - Registered special symbols by name
+SYMBOL_DETECTORS = {}
+
+
+def register_symbol_detector(name: str, base_type: str):
+    def decorator(match):
+        SYMBOL_DETECTORS[name] = SymbolDetector(name=name, base_type=base_type, match=match)
+        return match
+    return decorator
+
+
+def detect_symbols(endpoint_index: LinesEndpointIndex, symbols: list = None) -> dict:
+    """
+    Match all symbols in one pass over lines of the endpoint graph: every line is checked only by
+    the detectors with its type as base type.
+
+    Parameters:
+        endpoint_index (LinesEndpointIndex): Endpoint graph of all lines of the page.
+        symbols (list): Names of registered symbols. None - all registered.
+
+    Returns:
+        dict: Symbol name -> list of found symbols (lists of lines, base line first).
+    """
+    symbols = list(SYMBOL_DETECTORS) if symbols is None else symbols
+    unknown = [name for name in symbols if name not in SYMBOL_DETECTORS]
+    if unknown:
+        raise ValueError(f"Unknown special symbols: {unknown}, registered: {list(SYMBOL_DETECTORS)}")
+
+    detectors_by_type = {}
+    for name in symbols:
+        detector = SYMBOL_DETECTORS[name]
+        detectors_by_type.setdefault(detector.base_type, []).append(detector)
+
+    found = {name: [] for name in symbols}
+    for base_line, line_type in zip(endpoint_index.lines, endpoint_index.line_types):
+        for detector in detectors_by_type.get(line_type, ()):
+            symbol = detector.match(base_line, endpoint_index)
+            if symbol:
+                found[detector.name].append(symbol)
+    return found
+
+
+@register_symbol_detector('triangle', base_type='horizontal')
+def match_triangle(base_line, endpoint_index: LinesEndpointIndex):
     # we start off with base which is a horizontal line
-    triangles = []
-    for base_line in horizontal_lines:
-        base_start, base_end = base_line[:2], base_line[2:]
-        # find the first line relevant to lines
-        tmp_lines = {}
-        for line_1 in vertical_lines + inclined_lines:
-            line_1_start, line_1_end = line_1[:2], line_1[2:]
-            if line_1_start == base_start:
-                tmp = tmp_lines.get('to_the_left', [])
-                tmp.append(line_1)
-                tmp_lines['to_the_left'] = tmp
-            elif line_1_end == base_start:
-                tmp = tmp_lines.get('to_the_left', [])
-                tmp.append([*line_1_end, *line_1_start])
-                tmp_lines['to_the_left'] = tmp
-            elif line_1_start == base_end:
-                tmp = tmp_lines.get('to_the_right', [])
-                tmp.append(line_1)
-                tmp_lines['to_the_right'] = tmp
-            elif line_1_end == base_end:
-                tmp = tmp_lines.get('to_the_right', [])
-                tmp.append([*line_1_end, *line_1_start])
-                tmp_lines['to_the_right'] = tmp
-        # filtering of candidates
-        if len(tmp_lines.get('to_the_left', [])) == 1 and len(tmp_lines.get('to_the_right', [])) == 1:
-            to_the_left = tmp_lines['to_the_left'][0]
-            to_the_right = tmp_lines['to_the_right'][0]
-            # types of lines should be different
-            type_to_the_left = check_line_type(to_the_left)
-            type_to_the_right = check_line_type(to_the_right)
-            if (type_to_the_left == 'vertical' and type_to_the_right != type_to_the_left) \
-                    or type_to_the_left == 'other':
-                # lines should end at one point
-                if tuple(to_the_left[2:]) == tuple(to_the_right[2:]):
-                    triangles.append([base_line, to_the_left, to_the_right])
-    return triangles
-
-
-def find_Y(vertical_lines, inclined_lines):
-    # vertical line is a base here
-    y_lines = []
-    for base_line in vertical_lines:
-        base_start, base_end = base_line[:2], base_line[2:]
-        # find the lines relevant to base
-        tmp_lines = []
-        for line_1 in inclined_lines:
-            line_1_start, line_1_end = line_1[:2], line_1[2:]
-            if line_1_start == base_start:
-                tmp_lines.append(line_1)
-            elif line_1_end == base_start:
-                tmp_lines.append([*line_1_end, *line_1_start])
-
-        # filter lines
-        if len(tmp_lines) == 2:
-            line1, line2 = tmp_lines
-            if (not ((line1[2] < base_line[0] and line2[2] < base_line[0]) or \
-                     (line1[2] > base_line[0] and line2[2] > base_line[0]))) and \
-                    (not (line1[3] > base_line[1] or line2[3] > base_line[1])):
-                base_line_length = get_line_length(base_line)
-                line1_length = get_line_length(line1)
-                line2_length = get_line_length(line2)
-                if line1_length / base_line_length > 0.5 and line2_length / base_line_length > 0.5:
-                    y_lines.append([base_line, *tmp_lines])
-    return y_lines
-
-
-def find_closest_text(parsed_text, objects):
+    base_start, base_end = base_line[:2], base_line[2:]
+    # find the first line relevant to lines (vertical and inclined lines sharing an endpoint with base)
+    to_the_left = endpoint_index.arms(base_start, ('vertical', 'other'))
+    to_the_right = endpoint_index.arms(base_end, ('vertical', 'other'))
+    # filtering of candidates
+    if len(to_the_left) == 1 and len(to_the_right) == 1:
+        to_the_left, to_the_right = to_the_left[0], to_the_right[0]
+        # types of lines should be different
+        type_to_the_left = check_line_type(to_the_left)
+        type_to_the_right = check_line_type(to_the_right)
+        if (type_to_the_left == 'vertical' and type_to_the_right != type_to_the_left) \
+                or type_to_the_left == 'other':
+            # lines should end at one point
+            if tuple(to_the_left[2:]) == tuple(to_the_right[2:]):
+                return [base_line, to_the_left, to_the_right]
+    return None
+
+
+@register_symbol_detector('y', base_type='vertical')
+def match_y(base_line, endpoint_index: LinesEndpointIndex):
+    # vertical line is a base here, find inclined lines relevant to base start
+    tmp_lines = endpoint_index.arms(base_line[:2], ('other',))
+
+    # filter lines
+    if len(tmp_lines) == 2:
+        line1, line2 = tmp_lines
+        if (not ((line1[2] < base_line[0] and line2[2] < base_line[0]) or \
+                 (line1[2] > base_line[0] and line2[2] > base_line[0]))) and \
+                (not (line1[3] > base_line[1] or line2[3] > base_line[1])):
+            base_line_length = get_line_length(base_line)
+            line1_length = get_line_length(line1)
+            line2_length = get_line_length(line2)
+            if line1_length / base_line_length > 0.5 and line2_length / base_line_length > 0.5:
+                return [base_line, *tmp_lines]
+    return None
+
+
+@register_symbol_detector('ground', base_type='vertical')
+def match_ground(base_line, endpoint_index: LinesEndpointIndex, n_bars=3):
+    # vertical lead ending (bottom) at the middle of the widest bar, narrower bars centered below it
+    x, bottom = base_line[0], max(base_line[1], base_line[3])
+    bars = endpoint_index.at_midpoint((x, bottom), 'horizontal')
+    if len(bars) != 1:
+        return None
+    bars = [bars[0]]
+    width = abs(bars[0][2] - bars[0][0])
+    # - next bars are searched below within the width of the widest bar
+    for y in range(int(bottom) + 1, int(bottom + width) + 1):
+        for bar in endpoint_index.at_midpoint((x, y), 'horizontal'):
+            if abs(bar[2] - bar[0]) < abs(bars[-1][2] - bars[-1][0]):
+                bars.append(bar)
+                break
+        if len(bars) == n_bars:
+            return [base_line, *bars]
+    return None
+
+
+@register_symbol_detector('fuse', base_type='horizontal')
+def match_fuse(base_line, endpoint_index: LinesEndpointIndex, ratio=2):
+    # elongated rectangle (base is its top side) with conductor lines ending at the middles of its short sides
+    (x0, y0), (x1, _) = base_line[:2], base_line[2:]
+    left = [i for i in endpoint_index.arms((x0, y0), ('vertical',)) if i[3] > y0]
+    right = [i for i in endpoint_index.arms((x1, y0), ('vertical',)) if i[3] > y0]
+    if len(left) != 1 or len(right) != 1 or left[0][3] != right[0][3]:
+        return None
+    y1 = left[0][3]
+    bottom = [i for i in endpoint_index.arms((x0, y1), ('horizontal',)) if tuple(i[2:]) == (x1, y1)]
+    if not bottom:
+        return None
+
+    width, height = x1 - x0, y1 - y0
+    if width >= ratio * height:
+        # - horizontal conductor: lines going outside from the middles of left and right sides
+        middle = (y0 + y1) / 2
+        leads = [i for i in endpoint_index.arms((x0, middle), ('horizontal',)) if i[2] < x0] and \
+                [i for i in endpoint_index.arms((x1, middle), ('horizontal',)) if i[2] > x1]
+    elif height >= ratio * width:
+        # - vertical conductor: lines going outside from the middles of top and bottom sides
+        middle = (x0 + x1) / 2
+        leads = [i for i in endpoint_index.arms((middle, y0), ('vertical',)) if i[3] < y0] and \
+                [i for i in endpoint_index.arms((middle, y1), ('vertical',)) if i[3] > y1]
+    else:
+        leads = []
+    return [base_line, left[0], right[0], bottom[0]] if leads else None
+
+
+def find_triangles(horizontal_lines, vertical_lines, inclined_lines, endpoint_index: LinesEndpointIndex = None):
+    # endpoint_index: endpoint graph with vertical_lines and inclined_lines, built here if not given
+    if endpoint_index is None:
+        endpoint_index = LinesEndpointIndex(vertical_lines + inclined_lines)
+    triangles = [match_triangle(base_line, endpoint_index) for base_line in horizontal_lines]
+    return [i for i in triangles if i]
+
+
+def find_Y(vertical_lines, inclined_lines, endpoint_index: LinesEndpointIndex = None):
+    # endpoint_index: endpoint graph with inclined_lines (as in find_triangles), built here if not given
+    if endpoint_index is None:
+        endpoint_index = LinesEndpointIndex(vertical_lines + inclined_lines)
+    y_lines = [match_y(base_line, endpoint_index) for base_line in vertical_lines]
+    return [i for i in y_lines if i]
+
+
+def find_closest_text(parsed_text, objects, tol=3):
+    # text ends just left of object: text x0 <= object x0, |text x1 - object x0| < tol, |text y0 - object y0| < tol
+    # objects are sorted by x0 once, for each text only objects with x0 near text x1 are checked
+    order = sorted(range(len(objects)), key=lambda i: objects[i]['bbox'][0])
+    objects_x0 = [objects[i]['bbox'][0] for i in order]
     to_check = []
     for text in parsed_text:
         text_bbox = [text['x0'], text['y0'], text['x1'], text['y1']]
-        for obj in objects:
+        # - window is wider than tol, exact condition is checked below
+        start = bisect_left(objects_x0, max(text_bbox[0], text_bbox[2] - tol - 1))
+        end = bisect_right(objects_x0, text_bbox[2] + tol + 1)
+        for obj_idx in sorted(order[start:end]):
+            obj = objects[obj_idx]
             obj_bbox = obj['bbox']
-            if text_bbox[0] <= obj_bbox[0] and abs(text_bbox[2] - obj_bbox[0]) < 3 and \
-                    abs(text_bbox[1] - obj_bbox[1]) < 3:
+            if text_bbox[0] <= obj_bbox[0] and abs(text_bbox[2] - obj_bbox[0]) < tol and \
+                    abs(text_bbox[1] - obj_bbox[1]) < tol:
                 to_check.append([text, obj])
     return to_check
 
 
 def substitute_symbol_text(all_text, to_check, symbol='▲'):
+    # substituted texts are moved to the end of all_text (in order of their last substitution),
+    # positions are looked up by identity instead of list.remove scans
+    positions = {id(text): i for i, text in enumerate(all_text)}
+    moved = {}
     for ent in to_check:
         text, obj = ent
-        try:
-            all_text.remove(text)
-        except Exception as e:
-            print(e)
+        if id(text) not in positions and id(text) not in moved:
+            logger.warning(f"Text with bbox {[text['x0'], text['y0'], text['x1'], text['y1']]} is not in the list")
+        moved.pop(id(text), None)
 
         obj_bbox = obj['bbox']
         x_diff = abs(obj_bbox[2] - obj_bbox[0])
@@ -102,6 +273,8 @@ def substitute_symbol_text(all_text, to_check, symbol='▲'):
         text['spans'][-1]['chars'] = text['spans'][-1]['chars'] + [new_char]
         text['spans'][-1]['message'] = text['spans'][-1]['message'] + symbol
 
-        all_text.append(text)
+        moved[id(text)] = text
 
+    if moved:
+        all_text[:] = [text for text in all_text if id(text) not in moved] + list(moved.values())
     return all_text
@@ -1,8 +1,12 @@
 import cv2
 from src_utils.geometry_utils import fix_coords, scale_crop, fix_coords_line, \
-    is_point_inside_bbox, check_line_type, merge_close_lines, \
+    is_point_inside_bbox, merge_close_lines, \
     merge_on_one_line, rectangle_inside_rectangle, get_line_length, v_h_line_rectangle_overlap
 from src_utils.lines_merging import merge_small_lines_all
+from src_utils.img_processing import to_gray
+from src_utils.loading_utils import render_page
+from src_utils.columnar_text import ColumnarText, ColumnarTextBuilder
+from src_utils.spatial_index import IndexedText
 from collections import Counter
 import pandas as pd
 from scipy import stats
@@ -82,20 +86,33 @@ def find_lines_in_tables_img(img, tables_coords: list,
                              line_scale=30,
                              iterations=1,
                              blocksize=25,
-                             process_background=False):
+                             process_background=False,
+                             page=None,
+                             dpi=None):
+    # if page and dpi are given, only table boxes are rasterized (at dpi) instead of slicing the page image
     tables = {}
     shapes_to_scale = img.shape[1], img.shape[0]
     for coords in tables_coords:
         coords = fix_coords(coords)
         x1, y1, x2, y2 = coords
-        cropped_img = img[y1 + margin: y2 - margin, x1 + margin: x2 - margin]
-        gray = cv2.cvtColor(cropped_img, cv2.COLOR_BGR2GRAY)
+        if page is not None and dpi:
+            gray = render_page(page, dpi=dpi, gray=True,
+                               clip=(x1 + margin, y1 + margin, x2 - margin, y2 - margin))
+            zoom = dpi / 72
+        else:
+            cropped_img = img[y1 + margin: y2 - margin, x1 + margin: x2 - margin]
+            gray = to_gray(cropped_img)
+            zoom = 1
         _, threshold = adaptive_threshold(gray, process_background, blocksize=blocksize)
 
         h_mask, h_lines = find_lines(threshold, direction="horizontal", iterations=iterations,
                                      line_scale=line_scale)
         v_mask, v_lines = find_lines(threshold, direction="vertical", iterations=iterations,
                                      line_scale=line_scale)
+        if zoom != 1:
+            # back to page coordinates (pixels of the 72 DPI image)
+            v_lines = [tuple(int(round(i / zoom)) for i in line) for line in v_lines]
+            h_lines = [tuple(int(round(i / zoom)) for i in line) for line in h_lines]
 
         v_lines = [scale_crop(i, coords, shapes_to_scale) for i in v_lines]
         h_lines = [scale_crop(i, coords, shapes_to_scale) for i in h_lines]
@@ -107,20 +124,24 @@ def find_lines_in_tables_img(img, tables_coords: list,
 def find_lines_in_tables_svg(lines,
                              tables_coords: list,
                              tol=1):
+    # lines are fixed and classified once, then assigned to all tables with broadcasted containment masks
+    lines = [fix_coords_line(line) for line in lines]
+    lines_array = np.asarray(lines, dtype=np.float64).reshape(-1, 4)
+    x0, y0, x1, y1 = lines_array.T
+    is_vertical = (x0 == x1) & (y0 != y1)
+    is_horizontal = (y0 == y1) & (x0 != x1)
+
+    tables_coords = [fix_coords(coords) for coords in tables_coords]
+    tables_array = np.asarray(tables_coords, dtype=np.float64).reshape(-1, 4)
+    xmin, ymin, xmax, ymax = (tables_array[:, i, None] for i in range(4))
+    # - (tables, lines): start and end of line inside the table (is_point_inside_bbox)
+    inside = (xmin - tol <= x0) & (x0 <= xmax + tol) & (ymin - tol <= y0) & (y0 <= ymax + tol) & \
+             (xmin - tol <= x1) & (x1 <= xmax + tol) & (ymin - tol <= y1) & (y1 <= ymax + tol)
+
     tables = {}
-    for coords in tables_coords:
-        coords = fix_coords(coords)
-        v_lines = []
-        h_lines = []
-        for line in lines:
-            line = fix_coords_line(line)
-            line_type = check_line_type(line)
-            start, end = line[:2], line[2:]
-            if is_point_inside_bbox(start, coords, tol) and is_point_inside_bbox(end, coords, tol):
-                if line_type == 'vertical':
-                    v_lines.append(line)
-                elif line_type == 'horizontal':
-                    h_lines.append(line)
+    for coords, inside_table in zip(tables_coords, inside):
+        v_lines = [lines[i] for i in np.flatnonzero(inside_table & is_vertical).tolist()]
+        h_lines = [lines[i] for i in np.flatnonzero(inside_table & is_horizontal).tolist()]
 
         tables[tuple(coords)] = [merge_small_lines_all(v_lines), merge_small_lines_all(h_lines)]
 
@@ -158,6 +179,11 @@ def merge_close_lines_tables(tables, h_tol=3,
 
 
 def text_in_table(table_coords, parsed_text, c=0):
+    # - Indexed text (built once per page) is queried through its spatial index
+    if isinstance(parsed_text, ColumnarText):
+        return parsed_text.subset(parsed_text.query(table_coords, c=c))
+    if isinstance(parsed_text, IndexedText):
+        return parsed_text.query(table_coords, c=c)
     in_table = []
     for i in parsed_text:
         if rectangle_inside_rectangle(table_coords, [i['x0'], i['y0'], i['x1'], i['y1']], c=c):
@@ -346,9 +372,48 @@ def crop_bbox_by_message_size(inner_d, points, tol=1):
     return final_res
 
 
+def _spans_vlines_candidates(span_bbox, v_lines):
+    # (S, V) mask of v_lines whose extent overlaps span bbox - only these can intersect bbox edges
+    if not len(v_lines) or not len(span_bbox):
+        return np.zeros((len(span_bbox), len(v_lines)), dtype=bool)
+    lines = np.asarray(v_lines, dtype=np.float64)
+    min_x, max_x = np.minimum(lines[:, 0], lines[:, 2]), np.maximum(lines[:, 0], lines[:, 2])
+    min_y, max_y = np.minimum(lines[:, 1], lines[:, 3]), np.maximum(lines[:, 1], lines[:, 3])
+    return (min_x <= span_bbox[:, 2:3]) & (max_x >= span_bbox[:, 0:1]) & \
+           (min_y <= span_bbox[:, 3:4]) & (max_y >= span_bbox[:, 1:2])
+
+
+def _fix_text_bbox_vlines_columnar(found_text, v_lines, tol=1):
+    candidates = _spans_vlines_candidates(found_text.span_bbox, v_lines)
+    builder = ColumnarTextBuilder()
+    offsets = found_text.line_span_offsets.tolist()
+    for i in range(len(found_text)):
+        to_save_normal = []
+        for s in range(offsets[i], offsets[i + 1]):
+            points_to_process = []
+            if candidates[s].any():
+                bbox = found_text.span_bbox[s].tolist()
+                for line_idx in np.flatnonzero(candidates[s]):
+                    if_in, point = v_h_line_rectangle_overlap(v_lines[line_idx], bbox)
+                    if if_in:
+                        points_to_process.append(point)
+            if points_to_process:
+                for line in crop_bbox_by_message_size(found_text.span(s), points_to_process, tol=tol):
+                    builder.add_line(line)
+            else:
+                to_save_normal.append(s)
+
+        if to_save_normal:
+            builder.add_line_from_spans(found_text, to_save_normal)
+
+    return builder.build()
+
+
 def fix_text_bbox_vlines(found_text, v_lines, tol=1):
     # for each text bbox - check if any of v_lines intersects it
     # if so - crop bbox by space
+    if isinstance(found_text, ColumnarText):
+        return _fix_text_bbox_vlines_columnar(found_text, v_lines, tol=tol)
     new_text = []
     for d in found_text:
         to_save_normal = []
@@ -376,7 +441,8 @@ def fix_text_bbox_vlines(found_text, v_lines, tol=1):
             d_to_save['y1'] = max(to_save_normal, key=lambda x: x['y1'])['y1']
             new_text.append(d_to_save)
 
-    return new_text
+    # - Bboxes were changed -> new index over fixed text
+    return IndexedText(new_text) if isinstance(found_text, IndexedText) else new_text
 
 
 def get_columns(found_text_in_column, column_segment, v_lines, tol=1,
@@ -488,6 +554,63 @@ def check_line_x_ovelapping(line1, line2, tol=0.5):
             return True
 
 
+def _fitting_intervals(lower, upper, items_min, items_max):
+    # pairs (item, interval) for items lying strictly inside intervals (lower, upper)
+    if len(lower) and np.all(np.diff(lower) >= 0) and np.all(np.diff(upper) >= 0):
+        # sorted intervals -> fitting ones are a contiguous range [first, last) for every item
+        last = np.searchsorted(lower, items_min, side='left')
+        first = np.searchsorted(upper, items_max, side='right')
+        counts = np.maximum(last - first, 0)
+        item_idx = np.repeat(np.arange(len(items_min)), counts)
+        offsets = np.cumsum(counts) - counts
+        interval_idx = np.arange(counts.sum()) - np.repeat(offsets - first, counts)
+        return item_idx, interval_idx
+    fits = (items_min[:, None] > lower[None, :]) & (items_max[:, None] < upper[None, :])
+    return np.nonzero(fits)
+
+
+def assign_text_to_cells(text_bboxes, columns_x, rows_y, c=0):
+    """
+    Cells of every text item in one vectorized pass: item is in cell (column j, row k) if it lies strictly inside
+    [columns_x[j][0], rows_y[k][0], columns_x[j][1], rows_y[k][1]] enlarged by c (same as text_in_table).
+    Neighbouring cells may overlap after enlarging, so an item can be in several cells.
+
+    Parameters:
+        text_bboxes (np.ndarray): (N, 4) text bboxes.
+        columns_x (np.ndarray): (J, 2) x bounds of columns.
+        rows_y (np.ndarray): (K, 2) y bounds of rows.
+        c (float): Margin added to cells.
+
+    Returns:
+        tuple: Arrays (item_idx, column_idx, row_idx), one element per (item, cell) pair.
+    """
+    text_bboxes = np.asarray(text_bboxes, dtype=np.float64).reshape(-1, 4)
+    columns_x = np.asarray(columns_x, dtype=np.float64).reshape(-1, 2)
+    rows_y = np.asarray(rows_y, dtype=np.float64).reshape(-1, 2)
+
+    items_x = np.sort(text_bboxes[:, 0::2], axis=1)
+    items_y = np.sort(text_bboxes[:, 1::2], axis=1)
+    columns_x = np.sort(columns_x, axis=1) + [-c, c]
+    rows_y = np.sort(rows_y, axis=1) + [-c, c]
+
+    col_items, col_idx = _fitting_intervals(columns_x[:, 0], columns_x[:, 1], items_x[:, 0], items_x[:, 1])
+    row_items, row_idx = _fitting_intervals(rows_y[:, 0], rows_y[:, 1], items_y[:, 0], items_y[:, 1])
+
+    # - cross product of columns and rows of every item (pairs are grouped by item)
+    n = len(text_bboxes)
+    col_counts, row_counts = np.bincount(col_items, minlength=n), np.bincount(row_items, minlength=n)
+    col_offsets = np.cumsum(col_counts) - col_counts
+    row_offsets = np.cumsum(row_counts) - row_counts
+    pair_counts = col_counts * row_counts
+
+    item_idx = np.repeat(np.arange(n), pair_counts)
+    pair_offsets = np.cumsum(pair_counts) - pair_counts
+    m = np.arange(pair_counts.sum()) - np.repeat(pair_offsets, pair_counts)
+    column_idx = col_idx[col_offsets[item_idx] + m // row_counts[item_idx]]
+    row_idx = row_idx[row_offsets[item_idx] + m % row_counts[item_idx]]
+    return item_idx, column_idx, row_idx
+
+
 def get_rows(columns, h_lines, found_text, c=2,
              char_delimetr=','):
     # logic: for each column we are making a specific row bboxes in which we are searching for text
@@ -495,27 +618,34 @@ def get_rows(columns, h_lines, found_text, c=2,
     # at the end for each column we have text bboxes in it
 
     paired_h_column_lines = [h_lines[i:i + 2] for i in range(len(h_lines) - 1)]
-    data = [[] for _ in columns]
     bboxes = []
-    for idx, column in enumerate(columns):
-        column_name, col_lines = column
-        h_bboxes = [[col_lines[0][0] - c, line[0][1] - c, col_lines[1][0] + c, line[1][1] + c] for line in
-                    paired_h_column_lines]
-        bboxes.extend(h_bboxes)
-        values_in_column = []
-        for h_bbox in h_bboxes:
-            found_in_bbox = text_in_table(h_bbox, found_text, 3)
-            if found_in_bbox:
-                found_in_bbox = sorted(found_in_bbox, key=lambda x: x['y0'])
-                message = []
-                for i in found_in_bbox:
-                    message.append(' '.join([j['message'] for j in i['spans']]))
-                message = char_delimetr.join(message)
-                values_in_column.append(message)
-            else:
-                values_in_column.append(None)
-
-        data[idx] = data[idx] + values_in_column
+    for column_name, col_lines in columns:
+        bboxes.extend([[col_lines[0][0] - c, line[0][1] - c, col_lines[1][0] + c, line[1][1] + c] for line in
+                       paired_h_column_lines])
+
+    # text of every cell: items assigned to cells at once (cell bbox enlarged by 3, as text_in_table(h_bbox, 3)),
+    # items of a cell sorted by y0 and joined by char_delimetr
+    if isinstance(found_text, ColumnarText):
+        text_bboxes, messages = found_text.line_bbox, found_text.line_messages()
+    else:
+        text_bboxes = [[i['x0'], i['y0'], i['x1'], i['y1']] for i in found_text]
+        messages = [' '.join([j['message'] for j in i['spans']]) for i in found_text]
+    text_bboxes = np.asarray(text_bboxes, dtype=np.float64).reshape(-1, 4)
+
+    columns_x = [[col_lines[0][0] - c, col_lines[1][0] + c] for _, col_lines in columns]
+    rows_y = [[line[0][1] - c, line[1][1] + c] for line in paired_h_column_lines]
+    item_idx, column_idx, row_idx = assign_text_to_cells(text_bboxes, columns_x, rows_y, c=3)
+
+    values = np.full((len(columns), len(rows_y)), None, dtype=object)
+    order = np.lexsort((item_idx, text_bboxes[item_idx, 1], row_idx, column_idx))
+    item_idx, column_idx, row_idx = item_idx[order].tolist(), column_idx[order].tolist(), row_idx[order].tolist()
+    start = 0
+    for end in range(1, len(item_idx) + 1):
+        if end == len(item_idx) or (column_idx[end], row_idx[end]) != (column_idx[start], row_idx[start]):
+            values[column_idx[start], row_idx[start]] = char_delimetr.join([messages[i]
+                                                                            for i in item_idx[start:end]])
+            start = end
+    data = values.tolist()
 
     data = pd.DataFrame(np.array(data).T, columns=[i[0] for i in columns])
     data = data.dropna(how='all')
@@ -643,6 +773,11 @@ def post_process_table(inner_info,
 
 def drop_by_threshold(parsed_text, v_lines, h_lines,
                       q=0.5):
+    if isinstance(parsed_text, ColumnarText):
+        y_length_thrs = np.quantile(parsed_text.line_bbox[:, 3] - parsed_text.line_bbox[:, 1], q=q)
+        x_length_thrs = np.quantile(parsed_text.line_bbox[:, 2] - parsed_text.line_bbox[:, 0], q=q)
+        return [i for i in v_lines if abs(i[3] - i[1]) > y_length_thrs], \
+               [i for i in h_lines if abs(i[2] - i[0]) > x_length_thrs]
     y_length_thrs = np.quantile([i['y1'] - i['y0'] for i in parsed_text], q=q)
     x_length_thrs = np.quantile([i['x1'] - i['x0'] for i in parsed_text], q=q)
 
@@ -707,7 +842,7 @@ def find_contours(h_mask, v_mask):
 
 
 def get_contours_from_image(img, process_background=True):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = to_gray(img)
 
     _, threshold = adaptive_threshold(gray, process_background)
 
@@ -783,7 +918,7 @@ def find_tables_and_lines(contours, img, original_w, original_h,
         if new_crop.shape[0] < size_lim or new_crop.shape[1] < size_lim:
             continue
 
-        gray = cv2.cvtColor(new_crop, cv2.COLOR_BGR2GRAY)
+        gray = to_gray(new_crop)
 
         _, threshold = adaptive_threshold(gray, False)
 
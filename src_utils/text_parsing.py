@@ -1,10 +1,16 @@
-import fitz
+import re
+import bisect
 from tqdm import tqdm
 import numpy as np
-import cv2
-from src_utils.geometry_utils import fix_coords, scale, make_bigger_bbox
+from src_utils.geometry_utils import fix_coords_array, transform_bboxes, make_bigger_bbox
+from src_utils.loading_utils import render_page
+from src_utils.ocr_cache import ocr_cache, crop_hash
 import pytesseract
 import PIL.Image as pil_image
+from concurrent.futures import ThreadPoolExecutor
+from src_logging.log_config import setup_logger
+
+logger = setup_logger(__name__)
 
 
 def filter_parsed_text(parsed_text, height, width):
@@ -17,77 +23,199 @@ def filter_parsed_text(parsed_text, height, width):
     return filtered
 
 
-def parse_text_pdf(page):
-    result = page.get_text('rawdict')
-    new_results = []
+def _block_bboxes(block, with_chars, rot_mat=None):
+    # all line, span and char bboxes of the block in traversal order -> one array,
+    # rotated (if needed) and fixed at once instead of per bbox
+    bboxes = []
+    for inner_block in block.get('lines', []):
+        bboxes.append(inner_block['bbox'])
+        for span in inner_block['spans']:
+            bboxes.append(span['bbox'])
+            if with_chars:
+                bboxes.extend([char['bbox'] for char in span['chars']])
 
-    if page.rotation:
-        rot_mat = page.rotation_matrix
+    bboxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+    if rot_mat is not None:
+        bboxes = transform_bboxes(bboxes, rot_mat)
+    return fix_coords_array(bboxes)
 
-    for block in result['blocks']:
-        try:
-            for inner_block in block['lines']:
 
-                spans = {'spans': []}
-                bbox = inner_block['bbox']
-                if page.rotation:
-                    bbox_0, bbox_1 = list(fitz.Point(*bbox[:2]) * rot_mat), \
-                                     list(fitz.Point(*bbox[2:]) * rot_mat)
-                    bbox = bbox_0 + bbox_1
-                spans['x0'], spans['y0'], spans['x1'], spans['y1'] = fix_coords(bbox)
+def iter_text_pdf(page, width=None, height=None, with_chars=True, stats=None):
+    """
+    Yield text lines of the page one by one ({'spans': [...], 'x0', 'y0', 'x1', 'y1'}), without building
+    the whole list. Lines outside of (width, height) are skipped (same as filter_parsed_text),
+    spans with 'unoccupied' text are skipped.
 
-                for span in inner_block['spans']:
-                    d = {}
-                    bbox = span['bbox']
+    Parameters:
+        page (fitz.Page): PDF page.
+        width (float): Page width, None - lines are not filtered by location.
+        height (float): Page height, None - lines are not filtered by location.
+        with_chars (bool): Add per-char records to spans. If False, the lighter 'dict' extraction is used
+                           and spans have no 'chars'.
+        stats (dict): If given, filled with number of yielded ('lines') and skipped by location ('filtered') lines.
+    """
+    result = page.get_text('rawdict' if with_chars else 'dict')
+    rot_mat = page.rotation_matrix if page.rotation else None
+    if stats is not None:
+        stats.update(lines=0, filtered=0)
 
-                    if page.rotation:
-                        bbox_0, bbox_1 = list(fitz.Point(*bbox[:2]) * rot_mat), \
-                                         list(fitz.Point(*bbox[2:]) * rot_mat)
-                        bbox = bbox_0 + bbox_1
+    for block in result['blocks']:
+        # - bboxes are transformed per block -> only the current block is held as Python floats
+        page_bboxes = _block_bboxes(block, with_chars, rot_mat).tolist()
+        cursor = 0
+        for inner_block in block.get('lines', []):
+            spans = {'spans': []}
+            spans['x0'], spans['y0'], spans['x1'], spans['y1'] = page_bboxes[cursor]
+            cursor += 1
+
+            if width is not None and height is not None and \
+                    (spans['x0'] > width or spans['x1'] > width or spans['y0'] > height or spans['y1'] > height):
+                if stats is not None:
+                    stats['filtered'] += 1
+                cursor += sum(1 + (len(span['chars']) if with_chars else 0) for span in inner_block['spans'])
+                continue
 
-                    d['x0'], d['y0'], d['x1'], d['y1'] = fix_coords(bbox)
+            for span in inner_block['spans']:
+                span_bbox = page_bboxes[cursor]
+                cursor += 1
+                n_chars = len(span['chars']) if with_chars else 0
+                message = ''.join([i['c'] for i in span['chars']]) if with_chars else span['text']
+                if 'unoccupied' in message.lower():
+                    cursor += n_chars
+                    continue
 
-                    d['size'] = span['size']
-                    d['color'] = span['color']
-                    d['font'] = span['font']
-                    d['message'] = ''.join([i['c'] for i in span['chars']])
+                d = {}
+                d['x0'], d['y0'], d['x1'], d['y1'] = span_bbox
+                d['size'] = span['size']
+                d['color'] = span['color']
+                d['font'] = span['font']
+                d['message'] = message
 
+                if with_chars:
                     chars = []
+                    for char, (x0, y0, x1, y1) in zip(span['chars'], page_bboxes[cursor:cursor + n_chars]):
+                        chars.append({'message': char['c'], 'x0': x0, 'y0': y0, 'x1': x1, 'y1': y1})
+                    d['chars'] = chars
+                    cursor += n_chars
 
-                    for char in span['chars']:
-                        char_d = {}
+                spans['spans'].append(d)
 
-                        char_d['message'] = char['c']
+            if stats is not None:
+                stats['lines'] += 1
+            yield spans
 
-                        bbox = char['bbox']
+        # - Extracted block is not needed anymore
+        block.clear()
 
-                        if page.rotation:
-                            bbox_0, bbox_1 = list(fitz.Point(*bbox[:2]) * rot_mat), \
-                                             list(fitz.Point(*bbox[2:]) * rot_mat)
-                            bbox = bbox_0 + bbox_1
 
-                        char_d['x0'], char_d['y0'], char_d['x1'], char_d['y1'] = fix_coords(bbox)
+def parse_text_pdf(page):
+    return list(iter_text_pdf(page))
 
-                        chars.append(char_d)
 
-                    d['chars'] = chars
+def _ocr_crop(crop, ocr_config='', timeout=0):
+    # tesseract process is killed after timeout seconds -> None, the span is left as it is
+    try:
+        return pytesseract.image_to_string(crop, config=ocr_config,
+                                           timeout=timeout)
+    except RuntimeError as e:
+        logger.warning(f'OCR of span crop skipped : {str(e)}')
+        return None
+
+
+def _collect_texts(crops: dict, texts: list):
+    return {k: text for k, text in zip(crops, texts) if text is not None}
+
+
+def ocr_spans_per_span(crops: dict, ocr_config='',
+                       timeout=0, workers=1):
+    # one tesseract call per span crop
+    texts = [_ocr_crop(crop, ocr_config, timeout)
+             for crop in tqdm(crops.values())]
+    return _collect_texts(crops, texts)
+
 
-                    if 'unoccupied' in d['message'].lower():
-                        continue
-                    container = spans['spans']
-                    container.append(d)
-                    spans['spans'] = container
-                new_results.append(spans)
-        except Exception as e:
-            pass
+def ocr_spans_parallel(crops: dict, ocr_config='',
+                       timeout=0, workers=4):
+    # one tesseract call per span crop, at most `workers` tesseract processes at a time.
+    # Threads only wait for tesseract subprocesses, results are collected in crops order
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(crops)))) as executor:
+        texts = list(executor.map(lambda crop: _ocr_crop(crop, ocr_config, timeout),
+                                  crops.values()))
+    return _collect_texts(crops, texts)
 
-    return new_results
+
+def _batch_ocr_config(ocr_config):
+    # composite image has many lines -> "uniform block of text" page segmentation instead of single line
+    config = re.sub(r'--psm\s+\d+', '', ocr_config).split()
+    return ' '.join(config + ['--psm', '6'])
+
+
+def ocr_spans_batched(crops: dict, ocr_config='',
+                      timeout=0, workers=1,
+                      gap=20, max_height=4000):
+    # span crops are stacked into few composite images (one crop per row, separated by white gaps),
+    # each composite is recognized with one tesseract call and words are mapped back to rows by their boxes
+    config = _batch_ocr_config(ocr_config)
+    texts = {k: '' for k in crops}
+
+    batches, batch, height = [], [], gap
+    for k, crop in crops.items():
+        if batch and height + crop.height + gap > max_height:
+            batches.append(batch)
+            batch, height = [], gap
+        batch.append((k, crop))
+        height += crop.height + gap
+    if batch:
+        batches.append(batch)
+
+    for batch in batches:
+        width = max(crop.width for _, crop in batch) + 2 * gap
+        height = sum(crop.height + gap for _, crop in batch) + gap
+        composite = pil_image.new('L', (width, height), 255)
+
+        rows_top, y = [], gap
+        for _, crop in batch:
+            composite.paste(crop, (gap, y))
+            rows_top.append(y)
+            y += crop.height + gap
+
+        try:
+            data = pytesseract.image_to_data(composite, config=config, timeout=timeout,
+                                             output_type=pytesseract.Output.DICT)
+        except RuntimeError as e:
+            # spans of the timed out composite are left as they are
+            logger.warning(f'OCR of span crops batch skipped : {str(e)}')
+            for k, _ in batch:
+                del texts[k]
+            continue
+        words = {}
+        for text, left, top, h in zip(data['text'], data['left'], data['top'], data['height']):
+            if not text or not text.strip():
+                continue
+            row = bisect.bisect_right(rows_top, top + h / 2) - 1
+            if row >= 0:
+                words.setdefault(row, []).append((top, left, text.strip()))
+
+        for row, (k, _) in enumerate(batch):
+            # words of the row in reading order: by line (top), then left to right
+            row_words = sorted(words.get(row, []), key=lambda w: (round(w[0] / 10), w[1]))
+            texts[k] = ' '.join(w[2] for w in row_words)
+
+    return texts
+
+
+OCR_ENGINES = {'per_span': ocr_spans_per_span,
+               'parallel': ocr_spans_parallel,
+               'batched': ocr_spans_batched}
 
 
 def ocr_text(page, text_dict,
              pdf_size, ocr_config='',
              dpi=300,
-             to_add_border_pix=5):
+             to_add_border_pix=5,
+             ocr_engine='per_span',
+             ocr_workers=4,
+             ocr_timeout=0):
     # get mapping
     mapping = {}
     for c1, i in enumerate(text_dict):
@@ -96,17 +224,45 @@ def ocr_text(page, text_dict,
                     '∅' in j['message']:
                 mapping[(c1, c2)] = [j['x0'], j['y0'], j['x1'], j['y1']]
 
-    # get image and process it
-    pix = page.get_pixmap(dpi=dpi)
-    img = pil_image.frombytes('RGB', [pix.width, pix.height], pix.samples)
-    img = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2GRAY)
-    img = pil_image.fromarray(img)
+    if not mapping:
+        return text_dict
+
+    # render only the spans (padded by to_add_border_pix) at OCR dpi, straight to gray,
+    # so memory and time depend on the number of spans, not on the page size
+    crops = {}
+    for k, bbox in mapping.items():
+        clip = make_bigger_bbox([list(map(round, bbox))], to_add_border_pix)[0]
+        crop = render_page(page, dpi=dpi, gray=True, clip=clip, cache=False)
+        if crop.size:
+            crops[k] = pil_image.fromarray(crop)
     # ocr
+    # identical glyph crops (repeated on every sheet) are recognized once
+    cache_config = _batch_ocr_config(ocr_config) if ocr_engine == 'batched' else ocr_config
+    crop_keys = {k: crop_hash(crop, cache_config) for k, crop in crops.items()}
+    texts = {}
+    for k, crop_key in crop_keys.items():
+        text = ocr_cache.get(crop_key)
+        if text is not None:
+            texts[k] = text
+    # one crop per distinct hash is sent to tesseract, duplicates on the page reuse its text
+    to_ocr = {}
+    for k, crop in crops.items():
+        if k not in texts:
+            to_ocr.setdefault(crop_keys[k], (k, crop))
+    if to_ocr:
+        recognized = OCR_ENGINES[ocr_engine](dict(to_ocr.values()), ocr_config=ocr_config,
+                                             timeout=ocr_timeout, workers=ocr_workers)
+        by_crop_key = {crop_keys[k]: text for k, text in recognized.items()}
+        for crop_key, text in by_crop_key.items():
+            ocr_cache.put(crop_key, text)
+        for k, crop_key in crop_keys.items():
+            if k not in texts and crop_key in by_crop_key:
+                texts[k] = by_crop_key[crop_key]
+    # keep spans order of the mapping
+    texts = {k: texts[k] for k in crops if k in texts}
+
     to_del = []
-    for k, bbox in tqdm(mapping.items()):
-        bbox = scale(make_bigger_bbox([list(map(round, bbox))], to_add_border_pix)[0], pdf_size, (pix.width, pix.height))
-        text = pytesseract.image_to_string(img.crop(bbox),
-                                           config=ocr_config)
+    for k, text in texts.items():
         if text:
             text_dict[k[0]]['spans'][k[1]]['message'] = text.strip()
             for i in text_dict[k[0]]['spans']:
@@ -0,0 +1,142 @@
+# >>>> </> STANDARD IMPORTS </>
+# >>>> ********************************************************************************
+import io
+import os
+# >>>> ********************************************************************************
+
+# >>>> </> EXTERNAL IMPORTS </>
+# >>>> ********************************************************************************
+import numpy as np
+import ujson as json
+from fastapi import HTTPException, status
+from fastapi.responses import Response, UJSONResponse
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+# >>>> ********************************************************************************
+
+# ________________________________________________________________________________
+# --- WIRE FORMATS OF PARSED TEXT / LINES / RESULTS PAYLOADS ---
+# - json: default, msgpack: compact binary encoding of the same structure,
+#   npz: NumPy archive for flat numeric payloads (e.g. lines JSON: lines_data array + svg_width/svg_height)
+JSON_FORMAT = "json"
+MSGPACK_FORMAT = "msgpack"
+NPZ_FORMAT = "npz"
+
+FORMAT_EXTENSIONS = {".json": JSON_FORMAT,
+                     ".msgpack": MSGPACK_FORMAT,
+                     ".mpk": MSGPACK_FORMAT,
+                     ".npz": NPZ_FORMAT}
+
+FORMAT_MEDIA_TYPES = {JSON_FORMAT: "application/json",
+                      MSGPACK_FORMAT: "application/msgpack",
+                      NPZ_FORMAT: "application/x-npz"}
+
+_MEDIA_TYPE_FORMATS = {"application/json": JSON_FORMAT,
+                       "application/msgpack": MSGPACK_FORMAT,
+                       "application/x-msgpack": MSGPACK_FORMAT,
+                       "application/vnd.msgpack": MSGPACK_FORMAT,
+                       "application/x-npz": NPZ_FORMAT}
+
+
+def get_wire_format(filename: str = None, content_type: str = None, default: str = None) -> str:
+    """
+    Wire format of the payload by file name (or S3 file key) extension, then by content type.
+
+    Parameters:
+        filename (str): File name or S3 file key.
+        content_type (str): Content type of the uploaded file.
+        default (str): Format for unknown extensions and content types. None - raise HTTPException.
+
+    Returns:
+        str: "json", "msgpack" or "npz".
+    """
+    if filename:
+        wire_format = FORMAT_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+        if wire_format:
+            return wire_format
+
+    if content_type:
+        wire_format = _MEDIA_TYPE_FORMATS.get(content_type.split(";")[0].strip().lower())
+        if wire_format:
+            return wire_format
+
+    if default:
+        return default
+
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"File with filename {filename} does not end with "
+                               f"{', '.join(FORMAT_EXTENSIONS)}")
+
+
+def get_accepted_wire_format(accept: str = None) -> str:
+    """
+    Response wire format by Accept header: the first supported media type, JSON by default.
+    """
+    for media_type in (accept or "").split(","):
+        wire_format = _MEDIA_TYPE_FORMATS.get(media_type.split(";")[0].strip().lower())
+        if wire_format:
+            return wire_format
+    return JSON_FORMAT
+
+
+def _check_msgpack() -> None:
+    if msgpack is None:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="ERROR -> msgpack package is not installed, use JSON payloads.")
+
+
+def decode_payload(data: bytes, wire_format: str = JSON_FORMAT):
+    """
+    Decode payload bytes into Python objects (dicts, lists, numbers, strings).
+    NPZ arrays are returned as (nested) lists, 0-d arrays as scalars.
+    """
+    if wire_format == MSGPACK_FORMAT:
+        _check_msgpack()
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+    if wire_format == NPZ_FORMAT:
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            return {name: npz[name].item() if npz[name].ndim == 0 else npz[name].tolist()
+                    for name in npz.files}
+
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def encode_payload(data, wire_format: str = JSON_FORMAT) -> bytes:
+    """
+    Encode Python objects into payload bytes. NPZ supports only dicts of numeric arrays and scalars.
+    """
+    if wire_format == MSGPACK_FORMAT:
+        _check_msgpack()
+        return msgpack.packb(data, use_bin_type=True)
+
+    if wire_format == NPZ_FORMAT:
+        try:
+            arrays = {name: np.asarray(value) for name, value in data.items()} if isinstance(data, dict) else {}
+        except ValueError:
+            # - Ragged nested lists
+            arrays = {}
+        if not arrays or any(arr.dtype == object or arr.dtype.kind in "US" for arr in arrays.values()):
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail="ERROR -> Payload can not be encoded as NPZ, use JSON or msgpack.")
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    return json.dumps(data).encode("utf-8")
+
+
+def payload_response(data, wire_format: str = JSON_FORMAT, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Response with the payload in the negotiated wire format.
+    """
+    if wire_format == JSON_FORMAT:
+        return UJSONResponse(content=data, status_code=status_code)
+    return Response(content=encode_payload(data, wire_format),
+                    status_code=status_code,
+                    media_type=FORMAT_MEDIA_TYPES[wire_format])
@@ -1,16 +1,16 @@
 # >>>> </> STANDARD IMPORTS </>
 # >>>> ********************************************************************************
+import queue
 import logging
+import importlib
+import threading
 from functools import wraps
-from typing import Callable
-# import multiprocessing
-# from multiprocessing import Process, Queue, Pipe
+from typing import Callable, Optional
 # >>>> ********************************************************************************
 
-# >>>> </> LOCAL IMPORTS </>
+# >>>> </> EXTERNAL IMPORTS </>
 # >>>> ********************************************************************************
 from pathos.helpers import mp as pathos_mp
-from pathos.multiprocessing import ProcessPool
 # >>>> ********************************************************************************
 
 # >>>> </> LOCAL IMPORTS </>
@@ -23,72 +23,235 @@ from src_logging import log_config
 # --- INIT CONFIG - LOGGER SETUP ---
 logger = log_config.setup_logger(__name__, logging_level=logging.DEBUG)
 
+# - Heavy libraries imported by every worker before it accepts tasks
+WARM_UP_MODULES: tuple = ("numpy", "cv2", "fitz", "pandas", "pytesseract")
+
+# - Set to True inside worker processes (see parallel_task_v1)
+_IN_WORKER_PROCESS: bool = False
+
+
+def _worker_loop(conn, warm_up_modules: tuple):
+    """
+    - Main loop of the warm worker process: import heavy modules once, then execute tasks from the pipe.
+    """
+    global _IN_WORKER_PROCESS
+    _IN_WORKER_PROCESS = True
+
+    for module_name in warm_up_modules:
+        importlib.import_module(module_name)
+    conn.send(True)
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if task is None:
+            break
+
+        func_obj, args, kwargs = task
+        try:
+            result = (True, func_obj(*args, **kwargs))
+        except Exception as e:
+            result = (False, e)
+
+        try:
+            conn.send(result)
+        except Exception as e:
+            # - Result or exception could not be pickled -> send a plain error instead
+            conn.send((False, RuntimeError(f"Failed to send result from worker process: {e}")))
+
+
+class _WarmWorker:
+    """
+    - _WarmWorker class wraps a single long-lived worker process and its pipe.
+    """
+    def __init__(self, ctx, warm_up_modules: tuple):
+        self.conn, child_conn = ctx.Pipe(duplex=True)
+        self.process = ctx.Process(target=_worker_loop,
+                                   args=(child_conn, warm_up_modules),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self) -> None:
+        self.conn.recv()
+
+    def stop(self, timeout: float = 1) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+# ________________________________________________________________________________
+class WarmProcessPool:
+    """
+    - WarmProcessPool class keeps a fixed number of long-lived, pre-warmed worker processes.
+    - Every task runs with its own timeout; a hung or crashed worker is replaced without touching the others.
+    """
+    def __init__(self,
+                 nodes: int = settings.PARALLEL_PROC_WORKERS,
+                 proc_timeout: int = settings.PARALLEL_PROC_TIMEOUT,
+                 warm_up_modules: tuple = WARM_UP_MODULES):
+        """
+        Initialize WarmProcessPool instance. Worker processes are started on start() or on first use.
+
+        Parameters:
+            nodes (int): Number of worker processes.
+            proc_timeout (int): Default number of seconds to wait for a task result.
+            warm_up_modules (tuple): Modules to import in every worker before it accepts tasks.
+        """
+        self.nodes: int = nodes
+        self.proc_timeout: int = proc_timeout
+        self.warm_up_modules: tuple = warm_up_modules
+
+        # - "spawn" -> forking a process that already runs an event loop and threads is not safe
+        self._ctx = pathos_mp.get_context("spawn")
+        self._idle_workers: queue.Queue = queue.Queue()
+        self._workers: set = set()
+        self._lock = threading.Lock()
+        self._started: bool = False
+
+    def start(self) -> None:
+        """
+        Start and warm up worker processes if the pool is not running yet.
+        """
+        with self._lock:
+            if self._started:
+                return
+
+            # - Start all workers first and only then wait for them -> warm-up runs in parallel
+            workers = [_WarmWorker(self._ctx, self.warm_up_modules) for _ in range(self.nodes)]
+            for worker in workers:
+                worker.wait_ready()
+                self._workers.add(worker)
+                self._idle_workers.put(worker)
+
+            self._started = True
+            logger.info(f">>> WARM PROCESS POOL STARTED - WORKERS: {self.nodes} <<<")
+
+    def shutdown(self) -> None:
+        """
+        Stop all worker processes.
+        """
+        with self._lock:
+            for worker in list(self._workers):
+                worker.stop()
+            self._workers.clear()
+            self._idle_workers = queue.Queue()
+            self._started = False
+            logger.info(">>> WARM PROCESS POOL SHUT DOWN <<<")
+
+    def _replace_worker(self, worker: _WarmWorker) -> None:
+        with self._lock:
+            worker.kill()
+            self._workers.discard(worker)
+            # - Pool was shut down while the task was running -> nothing to replace
+            if not self._started:
+                return
+
+            new_worker = _WarmWorker(self._ctx, self.warm_up_modules)
+            new_worker.wait_ready()
+            self._workers.add(new_worker)
+            self._idle_workers.put(new_worker)
+
+    def apply(self, func_obj: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+              proc_timeout: Optional[int] = None):
+        """
+        Run function in a free worker process and wait for the result. Blocks while all workers are busy.
+
+        Parameters:
+            func_obj (Callable): Function to be processed in parallel.
+            args (tuple): Positional arguments to be passed to the function.
+            kwargs (dict): Keyword arguments to be passed to the function.
+            proc_timeout (int): Number of seconds to wait for the result (pool default if None).
+
+        Returns:
+            Function execution result.
+
+        Raises:
+            TimeoutError: If the task did not finish in time. The worker is recycled.
+            RuntimeError: If the worker process died while running the task. The worker is recycled.
+        """
+        self.start()
+        proc_timeout = self.proc_timeout if proc_timeout is None else proc_timeout
+
+        worker = self._idle_workers.get()
+        # - Worker goes back to the pool only after a complete task round trip, on any other failure
+        #   (dead worker, timeout, args or result that can not be pickled) it is recycled
+        is_healthy = False
+        try:
+            try:
+                worker.conn.send((func_obj, args, kwargs or {}))
+                is_finished = worker.conn.poll(proc_timeout)
+                if is_finished:
+                    is_ok, result = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                logger.error(f">>> Process - PID: {worker.process.pid} died: {e}. Recycling worker.")
+                raise RuntimeError(f"Worker process died while running the task: {e}")
+
+            if not is_finished:
+                logger.warning(f">>> Process - PID: {worker.process.pid}\n"
+                               f">>> Timed out after {proc_timeout} seconds. Recycling worker.")
+                raise TimeoutError(f"Task timed out after {proc_timeout} seconds")
+
+            is_healthy = True
+        finally:
+            if is_healthy:
+                self._idle_workers.put(worker)
+            else:
+                self._replace_worker(worker)
+
+        if not is_ok:
+            raise result
+        return result
+
+
+# ________________________________________________________________________________
+# --- PROCESS-WIDE WARM POOL INSTANCE ---
+warm_process_pool = WarmProcessPool()
+
 
 # --- PRODUCTION READY ---
 def parallel_task_with_timeout(func_obj: Callable,
-                               proc_timeout: int = settings.PARALLEL_TASK_PROC_TIMEOUT,
+                               proc_timeout: int = settings.PARALLEL_PROC_TIMEOUT,
                                **kwargs):
     """ --- PRODUCTION READY ---\n
-        - A decorator function that wraps a parameter function in a separate parallel process.
-        - Parallel process runs with timeout (user-defined or default settings.NN_PROC_TIMEOUT value).
+        - Runs a parameter function in a warm worker process of the shared pool.
+        - Task runs with timeout (user-defined or default settings.PARALLEL_PROC_TIMEOUT value).
 
         Args:
             func_obj(Callable): Function to be processed in parallel.
-            proc_timeout(int): Number of seconds to wait before the process is terminated.
+            proc_timeout(int): Number of seconds to wait before the worker is recycled.
             **kwargs: Keyword arguments to be passed to the function
 
         Returns:
-            Function execution result or None if the process timed out.
+            Function execution result or None if the task timed out.
     """
-
-    pool = ProcessPool(nodes=1)
-    result = pool.apipe(func_obj, **kwargs)
-
     try:
-        return result.get(timeout=proc_timeout)
-
-    except pathos_mp.TimeoutError:
-        logger.warning(f">>> Process - PID: {result.pool[0].pid}\n"
-                       f">>> Timed out after {proc_timeout} seconds.")
-        pool.terminate()
+        return warm_process_pool.apply(func_obj, kwargs=kwargs, proc_timeout=proc_timeout)
+    except TimeoutError:
         return None
 
 
-# def parallel_task_with_timeout(func_obj: Callable,
-#                                func_args: tuple,
-#                                proc_timeout: int = settings.NN_PROC_TIMEOUT):
-#     """ --- PRODUCTION READY ---\n
-#         - A decorator function that wraps a parameter function in a separate parallel process.
-#         - Parallel process runs with a chosen timeout.
-#
-#         Args:
-#             func_obj(Callable): Function to be processed in parallel.
-#             func_args(tuple): Function arguments.
-#             proc_timeout(int): Number of seconds to wait before the process is terminated.
-#
-#         Returns:
-#             Function execution result or None if the process timed out.
-#     """
-#
-#     pool = ProcessPool(nodes=1)
-#     result = pool.apipe(func_obj, *func_args)
-#
-#     try:
-#         return result.get(timeout=proc_timeout)
-#
-#     except pathos_mp.TimeoutError:
-#         logger.warning(f"--- Process - PID: {result.pool[0].pid} "
-#                        f"--- Timed out after {proc_timeout} seconds.")
-#         pool.terminate()
-#         return None
-
-
 # --- PRODUCTION READY ---
 def parallel_task_v1(func: Callable):
     """ --- PRODUCTION READY ---\n
 
-        A decorator that wraps a function in a separate multiprocessing.Process object and
-        runs it with a fixed settings.NN_PROC_TIMEOUT timeout.
+        A decorator that runs a function in a warm worker process of the shared pool
+        with a fixed settings.PARALLEL_PROC_TIMEOUT timeout.
 
         Returns:
             wrapper_function: A decorator function that wraps the decorated function.
@@ -96,187 +259,14 @@ def parallel_task_v1(func: Callable):
 
     @wraps(func)
     def wrapper_function(*args, **kwargs):
-        process_timeout: int = settings.NN_PROC_TIMEOUT
-
-        pool = ProcessPool(nodes=1)
-        result = pool.apipe(func, *args, **kwargs)
+        # - The decorated function is pickled by reference, i.e. as this wrapper -> run it inline in the worker
+        if _IN_WORKER_PROCESS:
+            return func(*args, **kwargs)
 
         try:
-            return result.get(timeout=process_timeout)
-        except pathos_mp.TimeoutError:
-            logger.warning(f"--- Process - PID: {result.pool[0].pid} "
-                           f"--- Timed out after {process_timeout} seconds.")
-            pool.terminate()
+            return warm_process_pool.apply(wrapper_function, args=args, kwargs=kwargs,
+                                           proc_timeout=settings.PARALLEL_PROC_TIMEOUT)
+        except TimeoutError:
             return None
 
     return wrapper_function
-
-# TODO: Fix in the future updates.
-# TODO: The parallel_task_with_timeout Decorator Func with Decorator Arg is not picklable (PicklingError)
-# --- __NOT__ PRODUCTION READY ---
-# def parallel_task_v1(func: Callable):
-#     """ --- __NOT__ PRODUCTION READY ---\n
-#
-#         A decorator that wraps a function in a separate multiprocessing.Process object and
-#         runs it with a fixed settings.NN_PROC_TIMEOUT timeout.
-#
-#         Returns:
-#             wrapper_function: A decorator function that wraps the decorated function.
-#     """
-#     # @wraps(func)
-#     def wrapper_function(*args, **kwargs):
-#         process_timeout: int = settings.NN_PROC_TIMEOUT
-#
-#         result_queue: Queue = multiprocessing.Queue()
-#
-#         process: Process = multiprocessing.Process(target=func,
-#                                                    args=(*args, result_queue),
-#                                                    kwargs=kwargs,
-#                                                    daemon=True)
-#
-#         process.start()
-#         process.join(process_timeout)
-#
-#         if process.is_alive():
-#             logger.warning(f"--- Process - PID: {process.pid} - Timed out after {process_timeout} seconds.")
-#             process.terminate()
-#             return None
-#
-#         if not result_queue.empty():
-#             return result_queue.get()
-#
-#         return None
-#     return wrapper_function
-
-
-# TODO: Fix in the future updates.
-# TODO: The parallel_task_with_timeout Decorator Func with Decorator Arg is not picklable (PicklingError)
-# --- __NOT__ PRODUCTION READY ---
-# def parallel_task_with_timeout(proc_timeout_seconds: int = settings.NN_PROC_TIMEOUT):
-#     """ --- __NOT__ PRODUCTION READY ---\n
-#         A decorator that wraps a function in a separate multiprocessing.Process object and
-#         runs it with a chosen timeout.
-#
-#         Args:
-#             proc_timeout_seconds(int): Number of seconds to wait before terminating the process.
-#
-#         Returns:
-#             decorator: A decorator function that wraps the algorithm function.
-#     """
-#
-#     def decorator(func: Callable):
-#         @wraps(func)
-#         def wrapper_function(*args, **kwargs):
-#             result_queue: Queue = multiprocessing.Queue()
-#
-#             process: Process = multiprocessing.Process(target=func,
-#                                                        args=(*args, result_queue),
-#                                                        kwargs=kwargs,
-#                                                        daemon=True)
-#             # # Define a new target function to capture the function's output and put it into the Queue
-#             # def target_func(f, args, kwargs, result_queue):
-#             #     result_queue.put(f(*args, **kwargs))
-#             # process: Process = multiprocessing.Process(target=target_func,
-#             #                                            args=(func, args, kwargs, result_queue))
-#
-#             process.start()
-#             process.join(proc_timeout_seconds)
-#
-#             if process.is_alive():
-#                 print(f"Process timed out after {proc_timeout_seconds} seconds.")
-#                 process.terminate()
-#                 return None
-#
-#             if not result_queue.empty():
-#                 return result_queue.get()
-#
-#             return None
-#         return wrapper_function
-#     return decorator
-
-
-# def child_process(func):
-#     """Makes the function run as a separate process. Needed for
-#     keras classifier with gridsearchcv to work on multiple datasets"""
-#     def wrapper(*args, **kwargs):
-#         def worker(conn, func, args, kwargs):
-#             conn.send(func(*args, **kwargs))
-#             conn.close()
-#         parent_conn, child_conn = Pipe()
-#         p = Process(target=worker, args=(child_conn, func, args, kwargs))
-#         p.start()
-#         ret = parent_conn.recv()
-#         p.join()
-#         return ret
-#     return wrapper
-
-
-# def task_with_timeout_and_cancellation(timeout_seconds: int):
-#     def decorator(func: Callable):
-#         @wraps(func)
-#         def wrapper(*args, **kwargs):
-#             # Use a Manager dict to allow communication between processes.
-#             manager = Manager()
-#             result_dict = manager.dict()
-#             error_dict = manager.dict()
-#
-#             # Define a new function that includes error handling and stores the result in result_dict.
-#             def func_wrapper(*args, **kwargs):
-#                 try:
-#                     result = func(*args, **kwargs)
-#                     result_dict['result'] = result
-#                 except Exception as e:
-#                     error_dict['error'] = str(e)
-#
-#             process = Process(target=func_wrapper, args=args, kwargs=kwargs)
-#             process.start()
-#
-#             process.join(timeout=timeout_seconds)
-#
-#             if process.is_alive():
-#                 # The process did not complete within timeout_seconds. Terminate it.
-#                 os.kill(process.pid, signal.SIGTERM)  # send sigterm signal
-#                 process.join()  # wait for the process to terminate
-#                 return {"error": f"Task timed out after {timeout_seconds} seconds"}
-#
-#             if 'error' in error_dict:
-#                 return {"error": error_dict['error']}
-#
-#             return result_dict['result']
-#
-#         return wrapper
-#
-#     return decorator
-
-
-# def parallel_task_with_timeout(proc_timeout: int = settings.NN_PROC_TIMEOUT):
-#     """ --- PRODUCTION READY ---\n
-#         - A decorator function that wraps a parameter function in a separate parallel process.
-#         - Parallel process runs with a chosen timeout.
-#
-#         Args:
-#             func_obj(Callable): Function to be processed in parallel.
-#             proc_timeout(int): Number of seconds to wait before the process is terminated.
-#
-#         Returns:
-#             decorator: A decorator function that wraps the real function in parameter.
-#     """
-#
-#     def decorator(func_obj: Callable):
-#         @wraps(func_obj)
-#         def wrapper_function(*args, **kwargs):
-#             pool = ProcessPool(nodes=1)
-#             result = pool.apipe(func_obj, *args, **kwargs)
-#
-#             try:
-#                 return result.get(timeout=proc_timeout)
-#
-#             except pathos_mp.TimeoutError:
-#                 logger.warning(f"--- Process - PID: {result.pool[0].pid} "
-#                                f"--- Timed out after {proc_timeout} seconds.")
-#                 pool.terminate()
-#                 return None
-#
-#         return wrapper_function
-#
-#     return decorator
@@ -0,0 +1,11 @@
+import os
+import sys
+from pathlib import Path
+
+# - Tests run without .env files: minimal settings required at import time, fake AWS credentials for moto
+os.environ.setdefault("PARALLEL_PROC_TIMEOUT", "60")
+os.environ.setdefault("AWS_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_SECRET_KEY", "testing")
+os.environ.setdefault("AWS_REGION_NAME", "us-east-1")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
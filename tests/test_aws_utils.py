@@ -0,0 +1,78 @@
+import boto3
+import pytest
+from moto import mock_aws
+
+from src_utils import aws_utils
+from src_utils.aws_utils import S3FileOps, get_s3_client, reset_s3_clients
+from src_utils.wire_format import msgpack
+
+BUCKET = "test-bucket"
+
+
+@pytest.fixture
+def s3_bucket():
+    with mock_aws():
+        reset_s3_clients()
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield BUCKET
+        reset_s3_clients()
+
+
+@pytest.fixture
+def client_creations(monkeypatch):
+    # - Count real boto3 client creations done by get_s3_client
+    calls = []
+    create_client = aws_utils.boto3.client
+
+    def counting_client(*args, **kwargs):
+        calls.append(kwargs.get("endpoint_url"))
+        return create_client(*args, **kwargs)
+
+    monkeypatch.setattr(aws_utils.boto3, "client", counting_client)
+    return calls
+
+
+PAYLOADS = {"json": {"parsed_text": [{"message": "LP-1", "x0": 1.5, "y0": 2, "x1": 30, "y1": 9}],
+                     "pdf_width": 612, "pdf_height": 792},
+            "npz": {"lines_data": [[0, 0, 10, 0], [5, 0, 5, 20]], "svg_width": 612, "svg_height": 792}}
+
+
+@pytest.mark.parametrize("extension, payload", [(".json", PAYLOADS["json"]),
+                                                (".msgpack", PAYLOADS["json"]),
+                                                (".npz", PAYLOADS["npz"]),
+                                                ("", PAYLOADS["json"])])
+def test_file_data_round_trip(s3_bucket, extension, payload):
+    if extension == ".msgpack" and msgpack is None:
+        pytest.skip("msgpack is not installed")
+    s3 = S3FileOps(s3_bucket_name=s3_bucket)
+
+    s3.upload_file_data(s3_file_key=f"inputs/page_0{extension}", data=payload)
+
+    assert s3.get_file_data(s3_file_key=f"inputs/page_0{extension}") == payload
+
+
+def test_unknown_extension_is_stored_as_json(s3_bucket):
+    s3 = S3FileOps(s3_bucket_name=s3_bucket)
+
+    s3.upload_file_data(s3_file_key="inputs/page_0.data", data=PAYLOADS["json"])
+
+    assert s3.get_json_file_data(s3_file_key="inputs/page_0.data") == PAYLOADS["json"]
+
+
+def test_client_is_reused_across_calls(s3_bucket, client_creations):
+    first, second = S3FileOps(s3_bucket_name=s3_bucket), S3FileOps(s3_bucket_name=s3_bucket)
+    for i in range(3):
+        first.upload_file_data(s3_file_key=f"outputs/{i}.json", data={"i": i})
+        assert second.get_file_data(s3_file_key=f"outputs/{i}.json") == {"i": i}
+
+    assert first.s3 is second.s3 is get_s3_client()
+    assert len(client_creations) == 1
+
+
+def test_client_per_endpoint(s3_bucket, client_creations):
+    default_client = get_s3_client()
+    minio_client = get_s3_client(endpoint_url="http://localhost:9000")
+
+    assert default_client is not minio_client
+    assert get_s3_client(endpoint_url="http://localhost:9000") is minio_client
+    assert client_creations == [None, "http://localhost:9000"]
@@ -0,0 +1,29 @@
+import asyncio
+
+from src_utils.jobs import JobManager, InMemoryJobStore, JOB_STATUS_FAILED, JOB_STATUS_SUCCEEDED
+
+
+async def sleeping_job(seconds):
+    await asyncio.sleep(seconds)
+    return {'slept': seconds}
+
+
+def test_shutdown_saves_cancelled_jobs_as_failed():
+    async def scenario():
+        manager = JobManager(job_store=InMemoryJobStore(), max_concurrent=1, queue_size=5)
+        done = await manager.submit('test', sleeping_job, request_data={}, seconds=0)
+        running = await manager.submit('test', sleeping_job, request_data={}, seconds=60)
+        queued = await manager.submit('test', sleeping_job, request_data={}, seconds=60)
+        await asyncio.sleep(0.05)
+
+        await manager.shutdown()
+
+        return [await manager.get(job['job_id']) for job in (done, running, queued)]
+
+    done, running, queued = asyncio.run(scenario())
+
+    assert done['status'] == JOB_STATUS_SUCCEEDED
+    for job in (running, queued):
+        assert job['status'] == JOB_STATUS_FAILED
+        assert 'cancelled on shutdown' in job['error']
+        assert job['finished_at'] is not None
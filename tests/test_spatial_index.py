@@ -0,0 +1,67 @@
+import random
+
+from src_utils.geometry_utils import rectangle_inside_rectangle
+from src_utils.spatial_index import IndexedText
+from src_utils.table_parsing import text_in_table
+
+
+def make_text(n=200, seed=0):
+    rnd = random.Random(seed)
+    text = []
+    for i in range(n):
+        x0, y0 = rnd.uniform(0, 500), rnd.uniform(0, 500)
+        text.append({'spans': [{'message': str(i)}], 'x0': x0, 'y0': y0,
+                     'x1': x0 + rnd.uniform(1, 40), 'y1': y0 + rnd.uniform(1, 10)})
+    return text
+
+
+def brute_force(bbox, text, c=0):
+    return [i for i in text if rectangle_inside_rectangle(bbox, [i['x0'], i['y0'], i['x1'], i['y1']], c=c)]
+
+
+def test_nested_queries_match_scan():
+    text = make_text()
+    indexed = IndexedText(text)
+    table = [50, 50, 400, 400]
+    segment = [100, 100, 300, 250]
+
+    in_table = text_in_table(table, indexed, c=5)
+    in_segment = text_in_table(segment, in_table)
+
+    assert isinstance(in_segment, IndexedText)
+    assert in_table.to_list() == brute_force(table, text, c=5)
+    assert in_segment.to_list() == brute_force(segment, brute_force(table, text, c=5))
+
+
+def test_items_are_not_shared_with_input():
+    text = make_text(20)
+    indexed = IndexedText(text)
+    everything = [-1, -1, 1000, 1000]
+    assert len(indexed.query(everything)) == 20
+
+    text.append({'spans': [], 'x0': 1, 'y0': 1, 'x1': 2, 'y1': 2})
+
+    assert len(indexed) == 20
+    assert len(indexed.query(everything)) == 20
+
+
+def test_invalidate_after_bbox_change():
+    text = make_text(20)
+    indexed = IndexedText(text)
+    region = [600, 600, 700, 700]
+    assert len(indexed.query(region)) == 0
+
+    indexed[0].update(x0=610, y0=610, x1=620, y1=620)
+    indexed.invalidate_spatial_index()
+
+    assert [i['spans'][0]['message'] for i in indexed.query(region)] == ['0']
+
+
+def test_sequence_protocol():
+    text = make_text(5)
+    indexed = IndexedText(text)
+
+    assert list(indexed) == text
+    assert indexed[-1] is text[-1]
+    assert indexed[1:3].to_list() == text[1:3]
+    assert not IndexedText()
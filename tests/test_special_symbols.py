@@ -0,0 +1,65 @@
+import pytest
+
+from src_utils.geometry_utils import normalize_lines
+from src_utils.special_symbols_parsing import LinesEndpointIndex, detect_symbols
+
+GROUND = [(50, 10, 50, 40), (40, 40, 60, 40), (44, 44, 56, 44), (47, 48, 53, 48)]
+# - horizontal conductor through an elongated rectangle
+FUSE = [(100, 100, 120, 100), (100, 100, 100, 106), (120, 100, 120, 106), (100, 106, 120, 106),
+        (90, 103, 100, 103), (120, 103, 130, 103)]
+# - vertical conductor through an elongated rectangle
+VERTICAL_FUSE = [(300, 100, 306, 100), (300, 100, 300, 120), (306, 100, 306, 120), (300, 120, 306, 120),
+                 (303, 90, 303, 100), (303, 120, 303, 130)]
+RECTANGLE = [(200, 200, 220, 200), (200, 200, 200, 206), (220, 200, 220, 206), (200, 206, 220, 206)]
+
+
+def find(lines, symbols=('ground', 'fuse')):
+    lines, line_types = normalize_lines(lines)
+    endpoint_index = LinesEndpointIndex([tuple(i) for i in lines.tolist()], line_types.tolist())
+    return detect_symbols(endpoint_index, list(symbols))
+
+
+def test_ground_found():
+    found = find(GROUND)
+
+    assert len(found['ground']) == 1
+    assert tuple(found['ground'][0][0]) == (50, 10, 50, 40)
+    assert found['fuse'] == []
+
+
+@pytest.mark.parametrize("lines", [GROUND[:3],  # - only two bars
+                                   GROUND[:2] + [(40, 44, 60, 44), (40, 48, 60, 48)],  # - bars do not narrow
+                                   [(50, 10, 50, 40), (50, 40, 70, 40), (44, 44, 56, 44), (47, 48, 53, 48)]],
+                         ids=["two_bars", "same_width_bars", "lead_off_center"])
+def test_ground_not_found(lines):
+    assert find(lines)['ground'] == []
+
+
+@pytest.mark.parametrize("lines", [FUSE, VERTICAL_FUSE], ids=["horizontal", "vertical"])
+def test_fuse_found(lines):
+    found = find(lines)
+
+    assert len(found['fuse']) == 1
+    assert len(found['fuse'][0]) == 4
+    assert found['ground'] == []
+
+
+@pytest.mark.parametrize("lines", [RECTANGLE,  # - no conductor leads
+                                   FUSE[:5],  # - lead on one side only
+                                   [(100, 100, 110, 100), (100, 100, 100, 106), (110, 100, 110, 106),
+                                    (100, 106, 110, 106), (90, 103, 100, 103), (110, 103, 120, 103)]],  # - not elongated
+                         ids=["no_leads", "one_lead", "not_elongated"])
+def test_fuse_not_found(lines):
+    assert find(lines)['fuse'] == []
+
+
+def test_symbols_on_one_page():
+    found = find(GROUND + FUSE + RECTANGLE + VERTICAL_FUSE)
+
+    assert len(found['ground']) == 1
+    assert len(found['fuse']) == 2
+
+
+def test_unknown_symbol():
+    with pytest.raises(ValueError):
+        find(GROUND, symbols=('ground', 'resistor'))